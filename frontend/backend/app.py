@@ -1,18 +1,38 @@
 import os
-import glob
 import json
+import logging
 import time
 import hashlib
 import re
 import subprocess
 import threading
 import sys
+from dataclasses import dataclass, field
 from functools import lru_cache
 from urllib.parse import urlparse
 
 from flask import Flask, jsonify, request, Response, stream_with_context
 from flask_cors import CORS
 
+try:
+    import orjson
+    HAVE_ORJSON = True
+except ImportError:
+    HAVE_ORJSON = False
+
+_loads = orjson.loads if HAVE_ORJSON else json.loads
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    HAVE_WATCHDOG = True
+except ImportError:
+    HAVE_WATCHDOG = False
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+log = logging.getLogger("app")
+log.setLevel(logging.INFO)
+
 # ---------------------------------------------------------------------
 # Config
 # ---------------------------------------------------------------------
@@ -37,16 +57,14 @@ for dir_path in possible_dirs:
 if DATA_DIR is None:
     DATA_DIR = os.environ.get("DATA_DIR", "./data")
 
-print(f"🔍 DATA_DIR set to: {DATA_DIR}")
-print(f"🔍 Current working directory: {os.getcwd()}")
-print(f"🔍 Full data path: {os.path.abspath(DATA_DIR)}")
-print(f"🔍 Data directory exists: {os.path.exists(DATA_DIR)}")
-if os.path.exists(DATA_DIR):
-    print(f"🔍 Files in data directory: {os.listdir(DATA_DIR)}")
-else:
-    print(f"❌ Data directory does not exist, will create it")
+log.info("DATA_DIR set to: %s (%s)", DATA_DIR, os.path.abspath(DATA_DIR))
+if not os.path.exists(DATA_DIR):
+    log.info("Data directory does not exist, will create it")
+elif log.isEnabledFor(logging.DEBUG):
+    log.debug("Files in data directory: %s", os.listdir(DATA_DIR))
 ENV_EVIDENCE_PATH = os.environ.get("EVIDENCE_PATH")
 ENV_ROUNDS_PATH = os.environ.get("ROUNDS_PATH")
+DEBUG = os.environ.get("FLASK_DEBUG") == "1"
 
 app = Flask(__name__)
 CORS(app)
@@ -54,6 +72,34 @@ CORS(app)
 # ---------------------------------------------------------------------
 # File discovery & caching helpers
 # ---------------------------------------------------------------------
+class _DirIndex:
+    """
+    In-memory listing of DATA_DIR file names, rebuilt with a single os.scandir
+    sweep only when the directory's own mtime changes (files added/removed/renamed).
+    """
+
+    def __init__(self):
+        self.dir_mtime: int | None = None
+        self.names: list[str] = []
+        self.lock = threading.Lock()
+
+    def refresh(self) -> list[str]:
+        try:
+            st = os.stat(DATA_DIR)
+        except FileNotFoundError:
+            self.dir_mtime, self.names = None, []
+            return self.names
+        with self.lock:
+            if st.st_mtime_ns != self.dir_mtime:
+                with os.scandir(DATA_DIR) as it:
+                    self.names = sorted(e.name for e in it if e.is_file() and not e.name.startswith("."))
+                self.dir_mtime = st.st_mtime_ns
+            return self.names
+
+
+_dir_index = _DirIndex()
+
+
 def _find_file_by_suffix(suffix: str, prefix: str | None = None) -> str:
     """
     Return the first file that matches "<prefix>*<suffix>" in DATA_DIR.
@@ -66,29 +112,22 @@ def _find_file_by_suffix(suffix: str, prefix: str | None = None) -> str:
         override = ENV_ROUNDS_PATH
 
     if override and os.path.exists(override):
-        print(f"🔍 Using override path: {override}")
         return override
 
-    pattern = f"{prefix}*{suffix}" if prefix else f"*{suffix}"
-    search_path = os.path.join(DATA_DIR, pattern)
-    print(f"🔍 Searching for pattern: {pattern} in {DATA_DIR}")
-    print(f"🔍 Full search path: {search_path}")
-    matches = sorted(glob.glob(search_path))
-    print(f"🔍 Found matches: {matches}")
-
-    # Also show all files in the directory for debugging
-    all_files = os.listdir(DATA_DIR) if os.path.exists(DATA_DIR) else []
-    print(f"🔍 All files in directory: {all_files}")
+    # names are kept sorted, so the first hit is the lexicographically smallest match
+    for name in _dir_index.refresh():
+        if name.endswith(suffix) and (not prefix or name.startswith(prefix)):
+            return os.path.join(DATA_DIR, name)
 
-    if not matches:
-        raise FileNotFoundError(f"No file matching '{pattern}' in {DATA_DIR}")
-    print(f"🔍 Returning file: {matches[0]}")
-    return matches[0]
+    pattern = f"{prefix}*{suffix}" if prefix else f"*{suffix}"
+    raise FileNotFoundError(f"No file matching '{pattern}' in {DATA_DIR}")
 
 
 def _file_info(suffix: str, prefix: str | None = None) -> tuple[str, float]:
     """
     Returns (path, mtime) so that downstream cache keys change when file updates.
+    Producers rewrite files in place (directory mtime unchanged), so the matched
+    file is always stat'ed fresh.
     """
     path = _find_file_by_suffix(suffix, prefix)
     return path, os.path.getmtime(path)
@@ -105,40 +144,132 @@ def _file_info_any(suffixes: list[str], prefix: str | None = None) -> tuple[str,
     raise last_err or FileNotFoundError("No matching file found")
 
 
-@lru_cache(maxsize=64)
+_json_cache: dict[str, tuple[float, object]] = {}  # path -> (mtime, parsed); one entry per file
+_json_cache_lock = threading.Lock()
+
+
 def _read_json(path: str, mtime: float):
     """
-    Read JSON with (path, mtime) as cache key. Retries briefly to tolerate
-    concurrent writes from producer scripts.
+    Read JSON, reusing the parse while the file's mtime is unchanged. Only the
+    latest parse per path is kept, so rewrites don't pin stale data in memory.
+    Producers write <file>.tmp and os.replace() it into place, so a read always
+    sees a complete file; the single short retry only covers writers that
+    don't follow that contract.
+    """
+    cached = _json_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        data = _load_json_file(path)
+    except ValueError:  # json.JSONDecodeError and orjson.JSONDecodeError
+        time.sleep(0.02)
+        data = _load_json_file(path)
+    with _json_cache_lock:
+        _json_cache[path] = (mtime, data)
+    return data
+
+
+def _load_json_file(path: str):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        chunks = []
+        while True:
+            chunk = os.read(fd, 1 << 20)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+    return _loads(b"".join(chunks))
+
+
+# path -> (file identity (dev, ino), head bytes, bytes consumed, items parsed so far)
+_jsonl_cache: dict[str, tuple[tuple[int, int], bytes, int, list]] = {}
+_jsonl_lock = threading.Lock()
+_JSONL_HEAD = 256  # leading bytes compared to spot a file truncated and rewritten in place
+
+
+def _parse_jsonl_lines(path: str, data: bytes) -> list:
+    items = []
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(_loads(line))
+        except ValueError:
+            log.warning("Skipping malformed JSONL line in %s", path)
+    return items
+
+
+def _read_json_incremental(path: str) -> tuple[list, int]:
+    """
+    Read an append-only JSONL file (one evidence item per line), parsing only
+    the bytes added since the previous call. Returns (items, offset). A file
+    that was recreated (new inode), shrank, or was rewritten in place (its
+    leading bytes changed) is reparsed from the start; a partially written
+    last line is left for the next call, and a malformed line is skipped.
     """
-    for _ in range(5):
+    with _jsonl_lock:
+        # forget files that have been cleaned away so the cache stays bounded
+        for other in [p for p in _jsonl_cache if p != path and not os.path.exists(p)]:
+            del _jsonl_cache[other]
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            time.sleep(0.12)
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                ident = (st.st_dev, st.st_ino)
+                ident0, head, offset, items = _jsonl_cache.get(path, (ident, b"", 0, []))
+                if ident != ident0 or st.st_size < offset or f.read(len(head)) != head:
+                    head, offset, items = b"", 0, []
+                if st.st_size > offset:
+                    f.seek(offset)
+                    chunk = f.read(st.st_size - offset)
+                    end = chunk.rfind(b"\n") + 1
+                    if end:
+                        if offset < _JSONL_HEAD:
+                            head = (head + chunk[:end])[:_JSONL_HEAD]
+                        # new list object so snapshots already handed out stay unchanged
+                        items = items + _parse_jsonl_lines(path, chunk[:end])
+                        offset += end
+                _jsonl_cache[path] = (ident, head, offset, items)
+        except FileNotFoundError:
+            _jsonl_cache.pop(path, None)
+            raise
+        return items, offset
 
 # ---------------------------------------------------------------------
 # Loaders (mtime-aware; no external caching here)
 # ---------------------------------------------------------------------
 def load_evidence(prefix: str | None):
     """
-    Loads evidence from file ending with .evidence.json OR evidence.json.
+    Loads evidence from file ending with .evidence.json, the in-progress
+    .evidence.jsonl sidecar, OR evidence.json.
     Accepts either:
       - list[ { id, url, title, snippet? ... } ]
       - { items: [ ... ], status?: "done" }
     Returns { "items": [...], "by_id": { id: item }, "status": <opt> }
     """
-    print(f"🔍 load_evidence called with prefix: {prefix}")
     # accept either naming scheme
-    path, mtime = _file_info_any([".evidence.json", "evidence.json"], prefix)
-    print(f"📁 Loading evidence from: {path}")
-    raw = _read_json(path, mtime)
-    print(
-        f"📄 Loaded evidence data: {type(raw)}, length: {len(raw) if isinstance(raw, (list, dict)) else 'unknown'}"
-    )
+    path, mtime = _file_info_any([".evidence.json", ".evidence.jsonl", "evidence.json"], prefix)
+    raw = _read_json_incremental(path)[0] if path.endswith(".jsonl") else _read_json(path, mtime)
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Loaded evidence from %s: %s, length %s", path, type(raw).__name__,
+                  len(raw) if isinstance(raw, (list, dict)) else "unknown")
+
+    return _parse_evidence(path, raw)
+
+
+_evidence_parse_cache: dict[str, tuple[object, dict]] = {}  # path -> (raw object, parsed result)
+
+
+def _parse_evidence(path: str, raw):
+    """
+    Build {items, by_id, status} from a loaded evidence file. The readers hand
+    back the same raw object until the file changes, so the parse is reused
+    (same dict references) on an identity hit.
+    """
+    cached = _evidence_parse_cache.get(path)
+    if cached and cached[0] is raw:
+        return cached[1]
 
     if isinstance(raw, dict):
         items = raw.get("items", [])
@@ -150,17 +281,14 @@ def load_evidence(prefix: str | None):
     if not isinstance(items, list):
         items = []
 
-    by_id = {}
-    for it in items:
-        _id = str(
-            it.get("id")
-            or it.get("evidence_id")
-            or it.get("url")
-            or f"e{len(by_id)}"
-        )
-        by_id[_id] = it
+    by_id = {
+        str(it.get("id") or it.get("evidence_id") or it.get("url") or f"e{i}"): it
+        for i, it in enumerate(items)
+    }
 
-    return {"items": items, "by_id": by_id, "status": status}
+    parsed = {"items": items, "by_id": by_id, "status": status}
+    _evidence_parse_cache[path] = (raw, parsed)
+    return parsed
 
 
 def load_rounds(prefix: str | None):
@@ -172,17 +300,190 @@ def load_rounds(prefix: str | None):
     """
     try:
         path, mtime = _file_info_any([".rounds.json", "rounds.json"], prefix)
-        print(f"Loading rounds from: {path}")
+        log.debug("Loading rounds from: %s", path)
     except FileNotFoundError:
-        print(f"No rounds file found for prefix: {prefix}")
+        log.debug("No rounds file found for prefix: %s", prefix)
         return {}
     return _read_json(path, mtime)
 
+
+@dataclass
+class State:
+    """Everything one SSE/poll tick needs, gathered from a single directory pass."""
+    evidence_items: list = field(default_factory=list)
+    evidence_by_id: dict = field(default_factory=dict)
+    evidence_status: str | None = None
+    rounds: dict | list = field(default_factory=dict)
+    report_present: bool = False
+    evidence_mtime: float = 0.0
+    rounds_mtime: float = 0.0
+    evidence_offset: int = 0  # bytes consumed when evidence comes from the .evidence.jsonl sidecar
+
+    @property
+    def done(self) -> bool:
+        if self.report_present:
+            return True
+        if isinstance(self.rounds, dict) and str(self.rounds.get("status", "")).lower() == "done":
+            return True
+        return str(self.evidence_status or "").lower() == "done"
+
+
+def collect_state(prefix: str | None) -> State:
+    """
+    Locate evidence/rounds/report files in one pass over the cached directory
+    index and read only the two JSON files found. Same matching rules as
+    load_evidence/load_rounds/is_done (".x.json" preferred over "x.json").
+    """
+    found: dict[str, str] = {}
+    for name in _dir_index.refresh():
+        if prefix and not name.startswith(prefix):
+            continue
+        for suffix in (".evidence.json", ".evidence.jsonl", "evidence.json", ".rounds.json", "rounds.json", "report.json"):
+            if suffix not in found and name.endswith(suffix):
+                found[suffix] = os.path.join(DATA_DIR, name)
+
+    ev_path = found.get(".evidence.json") or found.get(".evidence.jsonl") or found.get("evidence.json")
+    rd_path = found.get(".rounds.json") or found.get("rounds.json")
+    if ENV_EVIDENCE_PATH and os.path.exists(ENV_EVIDENCE_PATH):
+        ev_path = ENV_EVIDENCE_PATH
+    if ENV_ROUNDS_PATH and os.path.exists(ENV_ROUNDS_PATH):
+        rd_path = ENV_ROUNDS_PATH
+
+    state = State(report_present="report.json" in found)
+    if ev_path:
+        state.evidence_mtime = os.path.getmtime(ev_path)
+        if ev_path.endswith(".jsonl"):
+            raw, state.evidence_offset = _read_json_incremental(ev_path)
+        else:
+            raw = _read_json(ev_path, state.evidence_mtime)
+        ev = _parse_evidence(ev_path, raw)
+        state.evidence_items, state.evidence_by_id, state.evidence_status = ev["items"], ev["by_id"], ev["status"]
+    if rd_path:
+        state.rounds_mtime = os.path.getmtime(rd_path)
+        state.rounds = _read_json(rd_path, state.rounds_mtime) or {}
+    return state
+
+
+class _Watcher:
+    """
+    One background thread that refreshes collect_state() for every prefix with
+    an active subscriber and publishes the snapshot under a Condition, so K
+    connected SSE clients cost one directory pass + parse per tick instead of K.
+    A new State object is published only when a file actually changed.
+
+    With watchdog installed the thread sleeps until DATA_DIR reports a change
+    to one of the watched files (rescanning every fallback_interval in case an
+    event is missed); without it, it polls every interval.
+    """
+
+    WATCHED_SUFFIXES = (".evidence.json", ".evidence.jsonl", "evidence.json", ".rounds.json",
+                        "rounds.json", "report.json", ".report.md")
+
+    def __init__(self, interval: float = 0.25, fallback_interval: float = 5.0):
+        self.interval = interval
+        self.fallback_interval = fallback_interval
+        self.cond = threading.Condition()
+        self.snapshots: dict[str | None, State] = {}
+        self.subscribers: dict[str | None, int] = {}
+        self.thread: threading.Thread | None = None
+        self.changed = threading.Event()
+        self.observer = None
+
+    @staticmethod
+    def _key(state: State) -> tuple:
+        return (state.evidence_mtime, state.rounds_mtime, state.report_present)
+
+    def subscribe(self, prefix: str | None) -> State:
+        with self.cond:
+            self.subscribers[prefix] = self.subscribers.get(prefix, 0) + 1
+            if self.thread is None:
+                self._start_observer()
+                self.thread = threading.Thread(target=self._run, name="state-watcher", daemon=True)
+                self.thread.start()
+            if prefix not in self.snapshots:
+                self.snapshots[prefix] = collect_state(prefix)
+            return self.snapshots[prefix]
+
+    def unsubscribe(self, prefix: str | None) -> None:
+        with self.cond:
+            n = self.subscribers.get(prefix, 0) - 1
+            if n > 0:
+                self.subscribers[prefix] = n
+            else:
+                self.subscribers.pop(prefix, None)
+                self.snapshots.pop(prefix, None)
+
+    def wait(self, prefix: str | None, last: State, timeout: float) -> State:
+        """Block until the snapshot for prefix is replaced (or timeout); return the current one."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.snapshots.get(prefix, last) is not last, timeout=timeout)
+            return self.snapshots.get(prefix, last)
+
+    def _start_observer(self) -> None:
+        if not HAVE_WATCHDOG:
+            return
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            # Content changes only: opened/closed_no_write fire on our own reads and would spin the loop
+            EVENT_TYPES = ("modified", "created", "moved", "deleted", "closed")
+
+            def on_any_event(self, event):
+                if event.event_type not in self.EVENT_TYPES:
+                    return
+                paths = (event.src_path, getattr(event, "dest_path", "") or "")
+                if any(str(p).endswith(watcher.WATCHED_SUFFIXES) for p in paths):
+                    watcher.changed.set()
+
+        try:
+            observer = Observer()
+            observer.daemon = True
+            observer.schedule(_Handler(), DATA_DIR, recursive=False)
+            observer.start()
+            self.observer = observer
+        except Exception as e:
+            log.warning("watchdog unavailable (%s); polling every %ss", e, self.interval)
+            self.observer = None
+
+    def _sleep(self) -> None:
+        if self.observer is None:
+            time.sleep(self.interval)
+            return
+        self.changed.wait(self.fallback_interval)
+        self.changed.clear()
+
+    def _run(self) -> None:
+        while True:
+            self._sleep()
+            with self.cond:
+                prefixes = list(self.subscribers)
+            for prefix in prefixes:
+                try:
+                    state = collect_state(prefix)
+                except Exception as e:
+                    log.error("Watcher error for prefix %s: %s", prefix, e)
+                    continue
+                with self.cond:
+                    old = self.snapshots.get(prefix)
+                    if prefix in self.subscribers and (old is None or self._key(old) != self._key(state)):
+                        self.snapshots[prefix] = state
+                        self.cond.notify_all()
+
+
+_watcher = _Watcher()
+
 # ---------------------------------------------------------------------
 # Utilities
 # ---------------------------------------------------------------------
+_HOST_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*://([^/?#]+)")
+
+
+@lru_cache(maxsize=4096)
 def url_host(u: str) -> str:
     try:
+        m = _HOST_RE.match(u)
+        if m:
+            return m.group(1).lower()
         p = urlparse(u)
         return (p.netloc or u).lower()
     except Exception:
@@ -190,51 +491,95 @@ def url_host(u: str) -> str:
 
 
 def dedupe_preserve(xs):
-    seen, out = set(), []
-    for x in xs:
-        if x not in seen:
-            seen.add(x)
-            out.append(x)
-    return out
+    return list(dict.fromkeys(xs))
 
 
-def sse(payload: dict) -> str:
-    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+def _dumps(obj) -> bytes:
+    return orjson.dumps(obj) if HAVE_ORJSON else json.dumps(obj, ensure_ascii=False).encode("utf-8")
 
 
-def compute_sites(rounds, evidence_items, limit: int = 15) -> list[str]:
+def _json_response(obj, status: int = 200) -> Response:
+    """JSON response serialized with orjson directly, bypassing jsonify."""
+    return Response(_dumps(obj), status=status, mimetype="application/json")
+
+
+_evidence_body_cache: dict[str, tuple[float, bytes]] = {}  # path -> (mtime, serialized load_evidence())
+
+
+def evidence_body(prefix: str | None) -> bytes:
+    """Serialized /api/evidence payload, reused until the evidence file changes."""
+    path, mtime = _file_info_any([".evidence.json", ".evidence.jsonl", "evidence.json"], prefix)
+    cached = _evidence_body_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    body = _dumps(load_evidence(prefix))
+    _evidence_body_cache[path] = (mtime, body)
+    return body
+
+
+def sse(payload: dict) -> bytes:
+    body = orjson.dumps(payload) if HAVE_ORJSON else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return b"data: " + body + b"\n\n"
+
+
+# Constant SSE frames, encoded once
+_HEARTBEAT = b": keep-alive\n\n"
+_EV_DONE = sse({"type": "done"})
+
+
+@lru_cache(maxsize=64)
+def sse_progress(value: int, status: str) -> bytes:
+    """progress events only take a handful of distinct values, so their frames are cached."""
+    return sse({"type": "progress", "value": value, "status": status})
+
+
+_SITE_RE = re.compile(r"site:([a-zA-Z0-9.-]+)")
+
+
+def _compute_sites(rounds, evidence_items, limit: int = 15) -> list[str]:
     """
     Preferred: extract from rounds queries like 'site:domain.com'.
     Fallback: derive from evidence URLs.
     """
     sites: list[str] = []
+    seen: set[str] = set()
+
+    def add(site) -> bool:
+        """Append unseen site; returns True once the limit is reached."""
+        if site and site not in seen:
+            seen.add(site)
+            sites.append(site)
+        return len(sites) >= limit
+
     # If rounds is dict with explicit sites
     if isinstance(rounds, dict) and isinstance(rounds.get("sites"), list):
-        sites = list(dict.fromkeys(rounds["sites"]))  # dedupe preserve order
+        for s in rounds["sites"]:
+            if add(s):
+                return sites
     # Or list of rounds possibly containing queries
     elif isinstance(rounds, list):
         for r in rounds:
-            if isinstance(r, dict):
-                if isinstance(r.get("sites"), list):
-                    for s in r["sites"]:
-                        if s not in sites:
-                            sites.append(s)
-                if isinstance(r.get("queries"), list):
-                    for q in r["queries"]:
-                        for site in re.findall(r"site:([a-zA-Z0-9.-]+)", q):
-                            if site not in sites:
-                                sites.append(site)
+            if not isinstance(r, dict):
+                continue
+            if isinstance(r.get("sites"), list):
+                for s in r["sites"]:
+                    if add(s):
+                        return sites
+            if isinstance(r.get("queries"), list):
+                for q in r["queries"]:
+                    for site in _SITE_RE.findall(q):
+                        if add(site):
+                            return sites
 
     if not sites:
         for it in evidence_items[:20]:
-            host = url_host(it.get("url", ""))
-            if host and host not in sites:
-                sites.append(host)
+            if add(url_host(it.get("url", ""))):
+                break
 
-    return sites[:limit]
+    return sites
 
 
-def compute_bullets(evidence_items, limit: int = 4) -> list[str]:
+def _compute_bullets(evidence_items, limit: int = 4) -> list[str]:
     bullets: list[str] = []
     for it in evidence_items[:limit]:
         title = (it.get("title") or it.get("headline") or "").strip()
@@ -246,10 +591,43 @@ def compute_bullets(evidence_items, limit: int = 4) -> list[str]:
     return bullets
 
 
-def compute_cursor(evidence_items, sites) -> str:
+# Loaded lists keep their identity until the underlying file is reparsed, so
+# derived values are keyed on (id, len) of their inputs. The inputs themselves
+# are held in the entry and compared with `is`, so a recycled id never hits.
+_derived_cache: dict[tuple, tuple[tuple, list[str]]] = {}
+_DERIVED_CACHE_MAX = 64
+
+
+def _memo_by_identity(name: str, inputs: tuple, limit: int, compute) -> list[str]:
+    key = (name, limit) + tuple((id(x), len(x) if hasattr(x, "__len__") else -1) for x in inputs)
+    hit = _derived_cache.get(key)
+    if hit and all(a is b for a, b in zip(hit[0], inputs)):
+        return hit[1]
+    result = compute()
+    if len(_derived_cache) >= _DERIVED_CACHE_MAX:
+        _derived_cache.clear()
+    _derived_cache[key] = (inputs, result)
+    return result
+
+
+def compute_sites(rounds, evidence_items, limit: int = 15) -> list[str]:
+    return _memo_by_identity("sites", (rounds, evidence_items), limit,
+                             lambda: _compute_sites(rounds, evidence_items, limit))
+
+
+def compute_bullets(evidence_items, limit: int = 4) -> list[str]:
+    return _memo_by_identity("bullets", (evidence_items,), limit,
+                             lambda: _compute_bullets(evidence_items, limit))
+
+
+def compute_cursor(evidence_items, sites, ev_mtime: float = 0.0, rd_mtime: float = 0.0, strict: bool = False) -> str:
     """
-    Stable hash of the content we surface to the client. Changes when files change.
+    Cheap identity of the content we surface to the client: file mtimes plus
+    counts, so it changes whenever either file changes. Pass strict=True for a
+    SHA-1 over the content itself.
     """
+    if not strict:
+        return f"{ev_mtime:.6f}:{len(evidence_items)}:{rd_mtime:.6f}:{len(sites)}"
     h = hashlib.sha1()
     try:
         h.update(json.dumps(evidence_items, sort_keys=True, ensure_ascii=False).encode())
@@ -297,23 +675,73 @@ def is_done(prefix: str | None) -> bool:
     return False
 
 
-def run_research_pipeline(prefix: str | None = None) -> bool:
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+USE_SUBPROCESS = os.environ.get("USE_SUBPROCESS") == "1"
+PIPELINE_TIMEOUT_S = 300
+PIPELINE_QUESTION = "What area needs improvement and what problems do you see?"
+PIPELINE_PROVIDER = os.environ.get("PIPELINE_PROVIDER", "gemini")
+
+
+def _pipeline_run(objective: str, prefix: str | None, clean: bool = True) -> None:
+    """
+    Clean previous outputs and run the research pipeline in this process.
+    Imported lazily so the server starts without the pipeline's dependencies.
+    """
+    import clean_and_research
+    import deep_research_pipeline
+
+    if clean:
+        clean_and_research.clean_existing_data()
+    deep_research_pipeline.run_open_research(
+        PIPELINE_QUESTION, objective, objective, prefix or "output", PIPELINE_PROVIDER
+    )
+
+
+def start_pipeline_thread(objective: str, prefix: str | None, clean: bool = True) -> tuple[threading.Event, dict]:
     """
-    Run the deep_research_pipeline.py script and return True if successful.
+    Run _pipeline_run on a daemon thread. Returns (finished, result) where
+    result["ok"] / result["error"] are filled in before finished is set.
     """
+    finished, result = threading.Event(), {"ok": False, "error": None}
+
+    def target():
+        try:
+            _pipeline_run(objective, prefix, clean)
+            result["ok"] = True
+        except Exception as e:
+            result["error"] = e
+            log.exception("Research pipeline error: %s", e)
+        finally:
+            finished.set()
+
+    threading.Thread(target=target, name="research-pipeline", daemon=True).start()
+    return finished, result
+
+
+def run_research_pipeline(prefix: str | None = None, objective: str | None = None) -> bool:
+    """
+    Run the research pipeline and return True if successful. Runs in-process
+    on a worker thread unless USE_SUBPROCESS=1.
+    """
+    if not USE_SUBPROCESS:
+        finished, result = start_pipeline_thread(objective or prefix or "", prefix, clean=False)
+        if not finished.wait(PIPELINE_TIMEOUT_S):
+            log.warning("Research pipeline timed out for prefix: %s", prefix)
+            return False
+        return result["ok"]
     try:
         cmd = [sys.executable, "deep_research_pipeline.py"]
         if prefix:
             cmd.extend(["--prefix", prefix])
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=PIPELINE_TIMEOUT_S)
         if result.returncode != 0:
-            print("Pipeline stderr:\n", result.stderr)
+            log.error("Pipeline stderr:\n%s", result.stderr)
         return result.returncode == 0
     except subprocess.TimeoutExpired:
-        print(f"Research pipeline timed out for prefix: {prefix}")
+        log.warning("Research pipeline timed out for prefix: %s", prefix)
         return False
     except Exception as e:
-        print(f"Error running research pipeline: {e}")
+        log.error("Error running research pipeline: %s", e)
         return False
 
 # ---------------------------------------------------------------------
@@ -321,7 +749,7 @@ def run_research_pipeline(prefix: str | None = None) -> bool:
 # ---------------------------------------------------------------------
 @app.get("/api/health")
 def health():
-    print("🏥 Health check requested")
+    log.debug("Health check requested")
     return jsonify({"ok": True, "timestamp": time.time()})
 
 
@@ -337,7 +765,7 @@ def research_status():
         sites = compute_sites(rounds, ev["items"])
         bullets = compute_bullets(ev["items"])
 
-        return jsonify(
+        return _json_response(
             {
                 "status": "complete",
                 "data": {
@@ -361,7 +789,7 @@ def research_status():
             if report_file:
                 with open(report_file, "r", encoding="utf-8") as f:
                     report_content = f.read()
-                return jsonify(
+                return _json_response(
                     {
                         "status": "complete",
                         "data": {
@@ -371,11 +799,11 @@ def research_status():
                     }
                 )
             else:
-                return jsonify({"status": "no_data"})
+                return _json_response({"status": "no_data"})
         except Exception as e:
-            return jsonify({"status": "error", "error": str(e)})
+            return _json_response({"status": "error", "error": str(e)})
     except Exception as e:
-        return jsonify({"status": "error", "error": str(e)})
+        return _json_response({"status": "error", "error": str(e)})
 
 
 @app.get("/api/test-stream")
@@ -383,7 +811,7 @@ def test_stream():
     """
     Simple test endpoint to verify SSE is working
     """
-    print("🧪 Test stream requested")
+    log.debug("Test stream requested")
 
     @stream_with_context
     def gen():
@@ -406,18 +834,18 @@ def test_stream():
 def api_evidence():
     prefix = request.args.get("prefix") or None
     try:
-        return jsonify(load_evidence(prefix))
+        return Response(evidence_body(prefix), mimetype="application/json")
     except FileNotFoundError as e:
-        return jsonify({"items": [], "by_id": {}, "error": str(e)}), 404
+        return _json_response({"items": [], "by_id": {}, "error": str(e)}), 404
 
 
 @app.get("/api/rounds")
 def api_rounds():
     prefix = request.args.get("prefix") or None
     try:
-        return jsonify(load_rounds(prefix))
+        return _json_response(load_rounds(prefix))
     except FileNotFoundError as e:
-        return jsonify({"error": str(e)}), 404
+        return _json_response({"error": str(e)}), 404
 
 
 @app.get("/api/research")
@@ -436,7 +864,7 @@ def api_research():
     except FileNotFoundError:
         rounds = {}
 
-    return jsonify(
+    return _json_response(
         {
             "objective": objective,
             "rounds": rounds,
@@ -458,7 +886,7 @@ def api_research_stream():
     objective = (request.args.get("objective") or "").strip() or "your objective"
     prefix = request.args.get("prefix") or None
 
-    print(f"🌐 SSE request received - objective: {objective}, prefix: {prefix}")
+    log.info("SSE request received - objective: %s, prefix: %s", objective, prefix)
     os.makedirs(DATA_DIR, exist_ok=True)
 
     # Kick off background research (non-blocking)
@@ -469,15 +897,19 @@ def api_research_stream():
                 cmd.append(prefix)
             subprocess.Popen(
                 cmd,
-                cwd=os.path.dirname(os.path.abspath(__file__)),
+                cwd=BACKEND_DIR,
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.STDOUT,
             )
-            print("🚀 Background research started.")
+            log.info("Background research started.")
         except Exception as e:
-            print(f"❌ Background research error: {e}")
+            log.error("Background research error: %s", e)
 
-    threading.Thread(target=run_research_background, daemon=True).start()
+    if USE_SUBPROCESS:
+        threading.Thread(target=run_research_background, daemon=True).start()
+    else:
+        start_pipeline_thread(objective, prefix)
+        log.info("Background research started.")
 
     @stream_with_context
     def gen():
@@ -497,97 +929,107 @@ def api_research_stream():
         )
 
         last_cursor = ""
-        last_sites: list[str] = []
-        last_rounds_seen = None
+        last_sites: tuple[str, ...] | None = None
+        last_bullets: tuple[str, ...] = ()
+        last_progress = -1
+        last_mtimes = None  # (evidence_mtime, rounds_mtime) the derived values below were computed from
+        sites: list[str] = []
+        bullets: list[str] = []
+        cursor = ""
         last_ev_count = -1
         started = time.time()
         timeout_s = float(request.args.get("timeout", 300))  # 5 min
         heartbeat_every = 12  # seconds
         last_heartbeat = 0.0
 
-        while True:
-            now = time.time()
-            # Heartbeat keeps connections alive through proxies
-            if now - last_heartbeat > heartbeat_every:
-                yield ": keep-alive\n\n"
-                last_heartbeat = now
-
-            # Attempt to read current state
-            try:
-                ev = load_evidence(prefix)
-            except FileNotFoundError:
-                ev = {"items": [], "by_id": {}}
-            try:
-                rounds = load_rounds(prefix) or {}
-            except FileNotFoundError:
-                rounds = {}
-
-            sites = compute_sites(rounds, ev.get("items", []))
-            bullets = compute_bullets(ev.get("items", []))
-            cursor = compute_cursor(ev.get("items", []), sites)
-            done = is_done(prefix)
-
-            # Emit round/site chips if changed
-            if rounds != last_rounds_seen or sites != last_sites:
-                yield sse(
-                    {
-                        "type": "round",
-                        "round_id": 1,
-                        "queries": [],
-                        "chips": sites,
-                    }
-                )
-                last_rounds_seen = rounds
-                last_sites = sites
-
-            # Heuristic progress
-            progress = 5
-            if ev.get("items"):
-                progress = max(progress, 10)
-            if rounds:
-                progress = max(progress, 50)
-            if len(ev.get("items", [])) > max(0, last_ev_count):
-                progress = max(progress, 90)
-            if done:
-                progress = 100
-
-            if len(ev.get("items", [])) != last_ev_count:
-                last_ev_count = len(ev.get("items", []))
-
-            yield sse({"type": "progress", "value": progress, "status": "Working…"})
-
-            # Opportunistic summary updates
-            if bullets:
-                yield sse(
-                    {
-                        "type": "thinking-summary",
-                        "title": f"Findings for “{objective}”",
-                        "bullets": bullets,
-                    }
-                )
-
-            # Snapshot when content changes
-            if cursor != last_cursor:
-                last_cursor = cursor
-                yield sse(
-                    {
-                        "type": "snapshot",
-                        "cursor": cursor,
-                        "results": len(ev.get("items", [])),
-                        "sites": sites,
-                    }
-                )
-
-            if done:
-                yield sse({"type": "progress", "value": 100, "status": "Complete"})
-                yield sse({"type": "done"})
-                break
-
-            if now - started > timeout_s:
-                yield sse({"type": "progress", "value": progress, "status": "Timed out"})
-                break
-
-            time.sleep(0.5)  # poll interval
+        state = _watcher.subscribe(prefix)
+        try:
+            while True:
+                now = time.time()
+                # Heartbeat keeps connections alive through proxies
+                if now - last_heartbeat >= heartbeat_every:
+                    yield _HEARTBEAT
+                    last_heartbeat = now
+
+                # Current state comes from the shared watcher (no per-client file I/O)
+                ev = {"items": state.evidence_items, "by_id": state.evidence_by_id}
+                rounds = state.rounds
+
+                # Derived values only change when one of the files does
+                mtimes = (state.evidence_mtime, state.rounds_mtime)
+                if mtimes != last_mtimes:
+                    sites = compute_sites(rounds, ev.get("items", []))
+                    bullets = compute_bullets(ev.get("items", []))
+                    cursor = compute_cursor(ev.get("items", []), sites, *mtimes)
+                    last_mtimes = mtimes
+                done = state.done
+
+                # Emit round/site chips if changed (the payload only carries sites)
+                if tuple(sites) != last_sites:
+                    yield sse(
+                        {
+                            "type": "round",
+                            "round_id": 1,
+                            "queries": [],
+                            "chips": sites,
+                        }
+                    )
+                    last_sites = tuple(sites)
+
+                # Heuristic progress
+                progress = 5
+                if ev.get("items"):
+                    progress = max(progress, 10)
+                if rounds:
+                    progress = max(progress, 50)
+                if len(ev.get("items", [])) > max(0, last_ev_count):
+                    progress = max(progress, 90)
+                if done:
+                    progress = 100
+
+                if len(ev.get("items", [])) != last_ev_count:
+                    last_ev_count = len(ev.get("items", []))
+
+                if progress != last_progress:
+                    last_progress = progress
+                    yield sse_progress(progress, "Working…")
+
+                # Summary updates when the bullets change
+                if bullets and tuple(bullets) != last_bullets:
+                    last_bullets = tuple(bullets)
+                    yield sse(
+                        {
+                            "type": "thinking-summary",
+                            "title": f"Findings for “{objective}”",
+                            "bullets": bullets,
+                        }
+                    )
+
+                # Snapshot when content changes
+                if cursor != last_cursor:
+                    last_cursor = cursor
+                    yield sse(
+                        {
+                            "type": "snapshot",
+                            "cursor": cursor,
+                            "results": len(ev.get("items", [])),
+                            "sites": sites,
+                        }
+                    )
+
+                if done:
+                    yield sse_progress(100, "Complete")
+                    yield _EV_DONE
+                    break
+
+                if now - started > timeout_s:
+                    yield sse_progress(progress, "Timed out")
+                    break
+
+                # Sleep until the watcher publishes a change or the next heartbeat is due
+                state = _watcher.wait(prefix, state, timeout=max(0.0, heartbeat_every - (time.time() - last_heartbeat)))
+        finally:
+            _watcher.unsubscribe(prefix)
 
     headers = {
         "Content-Type": "text/event-stream",
@@ -599,59 +1041,106 @@ def api_research_stream():
 # ---------------------------------------------------------------------
 
 
+class _PollWaiter:
+    """
+    One shared long-poll for a (prefix, cursor) pair. The first request starts
+    a thread that waits on the state watcher until the cursor moves (or the
+    run is done); every concurrent request with the same key just waits on
+    `finished` and reads `result`, so N pollers cost one computation.
+    """
+
+    def __init__(self, prefix: str | None, cursor: str, timeout: float):
+        self.prefix = prefix
+        self.cursor = cursor
+        self.timeout = timeout
+        self.finished = threading.Event()
+        self.result: dict | None = None  # None means the wait timed out unchanged
+        self.failed = False
+
+    def run(self) -> None:
+        try:
+            self.result = self._wait_for_change()
+        except Exception as e:
+            self.failed = True
+            log.error("Poll waiter error for prefix %s: %s", self.prefix, e)
+        finally:
+            with _poll_lock:
+                if _poll_waiters.get((self.prefix, self.cursor)) is self:
+                    del _poll_waiters[(self.prefix, self.cursor)]
+            self.finished.set()
+
+    def _wait_for_change(self) -> dict | None:
+        deadline = time.time() + self.timeout
+        state = _watcher.subscribe(self.prefix)
+        try:
+            while True:
+                items = state.evidence_items
+                sites = compute_sites(state.rounds, items)
+                cursor = compute_cursor(items, sites, state.evidence_mtime, state.rounds_mtime)
+                if cursor != self.cursor or state.done:
+                    return {
+                        "changed": cursor != self.cursor,
+                        "cursor": cursor,
+                        "bullets": compute_bullets(items),
+                        "chips": sites,
+                        "results": len(items),
+                        "done": state.done,
+                    }
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                state = _watcher.wait(self.prefix, state, timeout=remaining)
+        finally:
+            _watcher.unsubscribe(self.prefix)
+
+
+_poll_waiters: dict[tuple[str | None, str], _PollWaiter] = {}
+_poll_lock = threading.Lock()
+
+
+def _join_poll(prefix: str | None, cursor: str, timeout: float) -> _PollWaiter:
+    with _poll_lock:
+        waiter = _poll_waiters.get((prefix, cursor))
+        if waiter is None:
+            waiter = _PollWaiter(prefix, cursor, timeout)
+            _poll_waiters[(prefix, cursor)] = waiter
+            threading.Thread(target=waiter.run, name="poll-waiter", daemon=True).start()
+        return waiter
+
+
 @app.get("/api/research/poll")
 def api_research_poll():
     """
     Long-poll for changes. Client passes last 'cursor'.
     Returns {changed: True, cursor, bullets, chips, results, done} when different
     or when 'done' is True; otherwise times out with {changed: False, cursor}.
+    Concurrent polls for the same (prefix, cursor) share one waiter.
     """
     objective = (request.args.get("objective") or "").strip() or "your objective"
     prefix = request.args.get("prefix") or None
     client_cursor = request.args.get("cursor") or ""
     timeout = float(request.args.get("timeout", 20))  # seconds
-    interval = float(request.args.get("interval", 0.7))  # seconds
 
-    started = time.time()
+    deadline = time.time() + timeout
     while True:
-        try:
-            ev = load_evidence(prefix)
-        except FileNotFoundError:
-            ev = {"items": [], "by_id": {}}
-        try:
-            rounds = load_rounds(prefix) or {}
-        except FileNotFoundError:
-            rounds = {}
-
-        sites = compute_sites(rounds, ev["items"])
-        bullets = compute_bullets(ev["items"])
-        cursor = compute_cursor(ev["items"], sites)
-        done = is_done(prefix)
-
-        if cursor != client_cursor or done:
-            return jsonify(
-                {
-                    "objective": objective,
-                    "changed": cursor != client_cursor,
-                    "cursor": cursor,
-                    "bullets": bullets,
-                    "chips": sites,
-                    "results": len(ev["items"]),
-                    "done": done,
-                }
-            )
-
-        if time.time() - started >= timeout:
-            return jsonify(
-                {
-                    "objective": objective,
-                    "changed": False,
-                    "cursor": client_cursor,
-                    "done": False,
-                }
-            )
-
-        time.sleep(interval)
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+        # Joining an existing waiter may inherit a shorter timeout; rejoin until ours expires
+        waiter = _join_poll(prefix, client_cursor, remaining)
+        if waiter.finished.wait(remaining) and waiter.result is not None:
+            return _json_response({"objective": objective, **waiter.result})
+        if waiter.failed:
+            break
+
+    return _json_response(
+        {
+            "objective": objective,
+            "changed": False,
+            "cursor": client_cursor,
+            "done": False,
+        }
+    )
 
 # ---------------------------------------------------------------------
 # Entrypoint
@@ -659,9 +1148,17 @@ def api_research_poll():
 if __name__ == "__main__":
     os.makedirs(DATA_DIR, exist_ok=True)
     port = int(os.environ.get("PORT", 5001))
-    print(f"🚀 Starting Flask server on http://0.0.0.0:{port}")
-    print(f"📁 Data directory: {DATA_DIR}")
-    print(f"📁 Data directory exists: {os.path.exists(DATA_DIR)}")
-    if os.path.exists(DATA_DIR):
-        print(f"📁 Files in data directory: {os.listdir(DATA_DIR)}")
-    app.run(host="0.0.0.0", port=port, debug=True)
+    log.info("Starting server on http://0.0.0.0:%d (data directory: %s)", port, DATA_DIR)
+    # Waitress gives every SSE stream its own thread; the Werkzeug dev server is
+    # only used with FLASK_DEBUG=1. For many concurrent SSE clients on Linux:
+    #   gunicorn -k gevent -w 1 --threads 32 app:app
+    if DEBUG:
+        app.run(host="0.0.0.0", port=port, debug=True, threaded=True)
+    else:
+        try:
+            from waitress import serve
+        except ImportError:
+            log.warning("waitress not installed; falling back to the threaded Flask server")
+            app.run(host="0.0.0.0", port=port, debug=False, threaded=True)
+        else:
+            serve(app, host="0.0.0.0", port=port, threads=16, channel_timeout=600)
@@ -5,36 +5,15 @@ This ensures fresh research is conducted instead of loading cached data.
 """
 
 import os
-import glob
 import subprocess
 import sys
 from pathlib import Path
 
+from clean_data import remove_research_files
+
 def clean_existing_data():
     """Remove all existing research data files."""
-    data_dir = "./data"
-    
-    # Patterns to match existing research files
-    patterns = [
-        "*.evidence.json",
-        "*.rounds.json", 
-        "*.report.json",
-        "*.report.md"
-    ]
-    
-    cleaned_files = []
-    
-    for pattern in patterns:
-        files = glob.glob(os.path.join(data_dir, pattern))
-        for file_path in files:
-            try:
-                os.remove(file_path)
-                cleaned_files.append(file_path)
-                print(f"🗑️  Removed: {file_path}")
-            except Exception as e:
-                print(f"❌ Error removing {file_path}: {e}")
-    
-    return cleaned_files
+    return remove_research_files("./data")
 
 def run_research_pipeline(objective, prefix=None):
     """Run the deep research pipeline with the given objective."""
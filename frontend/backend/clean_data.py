@@ -5,31 +5,42 @@ Run this before testing to ensure fresh research is conducted.
 """
 
 import os
-import glob
+
+# Research output files
+OUTPUT_SUFFIXES = (
+    ".evidence.json",
+    ".evidence.jsonl",
+    ".rounds.json",
+    ".report.json",
+    ".report.md",
+)
+# ...plus the pipeline's own temp files left by an interrupted write (<name>.tmp, see write_outputs);
+# other tools' *.tmp files in the data directory are left alone
+RESEARCH_SUFFIXES = OUTPUT_SUFFIXES + tuple(
+    s + ".tmp" for s in (".evidence.json", ".rounds.json", ".report.json", ".report.md")
+)
+
+def remove_research_files(data_dir="./data"):
+    """Remove research output files from data_dir in a single directory pass."""
+    removed = []
+    try:
+        with os.scandir(data_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(RESEARCH_SUFFIXES) or entry.name.startswith("."):
+                    continue
+                try:
+                    os.unlink(entry.path)
+                    removed.append(entry.path)
+                    print(f"🗑️  Removed: {entry.path}")
+                except OSError as e:
+                    print(f"❌ Error removing {entry.path}: {e}")
+    except FileNotFoundError:
+        pass
+    return removed
 
 def clean_data():
     """Remove all existing research data files."""
-    data_dir = "./data"
-    
-    # Patterns to match existing research files
-    patterns = [
-        "*.evidence.json",
-        "*.rounds.json", 
-        "*.report.json",
-        "*.report.md"
-    ]
-    
-    cleaned_files = []
-    
-    for pattern in patterns:
-        files = glob.glob(os.path.join(data_dir, pattern))
-        for file_path in files:
-            try:
-                os.remove(file_path)
-                cleaned_files.append(file_path)
-                print(f"🗑️  Removed: {file_path}")
-            except Exception as e:
-                print(f"❌ Error removing {file_path}: {e}")
+    cleaned_files = remove_research_files("./data")
     
     if cleaned_files:
         print(f"✅ Cleaned {len(cleaned_files)} existing files")
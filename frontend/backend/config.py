@@ -26,8 +26,17 @@ JINA_API_KEY = os.getenv("JINA_API_KEY", "")
 # ---------- Configuration Constants ----------
 MAX_URLS_PER_ROUND = 30
 MAX_ROUNDS = 3
+MAX_EVIDENCE_ITEMS = 15  # evidence window the feasibility judge reads
+
+# Semantic verdict cache for hypothesis feasibility checks (requires sentence-transformers)
+SEMANTIC_CACHE = os.getenv("SEMANTIC_CACHE", "").lower() in ("1", "true", "yes")
+SEMANTIC_CACHE_MODEL = os.getenv("SEMANTIC_CACHE_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
 
 # ---------- LLM Prompts ----------
+# Each prompt is split into a static instruction block (*_PROMPT) sent first as the
+# system instruction, and a small dynamic block (*_INPUT) sent after it. Keeping the
+# large static text as an unchanging prefix lets Gemini/Cohere prompt caching apply.
 
 PARSE_LOCALE_PROMPT = """
 ## ROLE
@@ -36,10 +45,6 @@ You are a geographic information extraction specialist for land-use research sys
 ## TASK
 Extract structured location data from user responses about specific sites, buildings, or areas.
 
-## INPUT
-Question: {question}
-User Response: {answer}
-
 ## EXTRACTION REQUIREMENTS
 Extract the following fields with high accuracy:
 - site: Specific property address, building name, or location identifier (keep building names like "society145" as-is)
@@ -74,6 +79,12 @@ Output: {"site": "tower blue", "city": "Vancouver", "region_or_state": "British
 - Return only the JSON object, no markdown formatting
 """
 
+PARSE_LOCALE_INPUT = """
+## INPUT
+Question: {question}
+User Response: {answer}
+"""
+
 HYPOTHESIS_GENERATION_PROMPT = """
 ## ROLE
 You are an urban planning consultant specializing in community development and optimizing underutilized spaces.
@@ -81,13 +92,6 @@ You are an urban planning consultant specializing in community development and o
 ## TASK
 Generate specific, actionable development hypotheses for improving underutilized areas around residential buildings based on user feedback about missing amenities and accessibility issues.
 
-## INPUT
-User Feedback: {user_feedback}
-Site: {site}
-City: {city}
-Region: {region}
-Country: {country}
-
 ## ANALYSIS FRAMEWORK
 The user has identified an area with:
 - Empty/underutilized space (parking lots, vacant land, unused ground floors)
@@ -174,6 +178,15 @@ Output: {
 - Return only valid JSON, no additional text
 """
 
+HYPOTHESIS_GENERATION_INPUT = """
+## INPUT
+User Feedback: {user_feedback}
+Site: {site}
+City: {city}
+Region: {region}
+Country: {country}
+"""
+
 PLANNER_PROMPT = """
 ## ROLE
 You are a strategic research coordinator specializing in municipal planning and land-use feasibility studies.
@@ -181,13 +194,6 @@ You are a strategic research coordinator specializing in municipal planning and
 ## OBJECTIVE
 Generate comprehensive search queries to gather authoritative information for land-use change feasibility analysis.
 
-## CONTEXT
-Research Target: {topic}
-Location: {site}
-Municipality: {city}
-Administrative Region: {region}
-Country: {country}
-
 ## SEARCH STRATEGY
 Prioritize official government and institutional sources in this order:
 1. Municipal government websites (cityname.gov, cityname.ca, cityname.org)
@@ -240,11 +246,11 @@ Generate queries across these critical areas:
 
 ## EXAMPLE QUERY FORMATS
 - "site:waterloo.ca zoning by-law permitted uses commercial development"
-- "{city} floodplain map conservation authority PDF"
-- "{city} wastewater capacity study commercial development connection"
-- "{city} council minutes variance approval commercial development"
-- "{city} {region} official plan commercial development policies"
-- "{city} building permits commercial construction requirements"
+- "<city> floodplain map conservation authority PDF"
+- "<city> wastewater capacity study commercial development connection"
+- "<city> council minutes variance approval commercial development"
+- "<city> <region> official plan commercial development policies"
+- "<city> building permits commercial construction requirements"
 
 ## QUALITY STANDARDS
 - Each query must target specific, actionable information
@@ -253,6 +259,15 @@ Generate queries across these critical areas:
 - Prioritize recent and authoritative sources
 """
 
+PLANNER_INPUT = """
+## CONTEXT
+Research Target: {topic}
+Location: {site}
+Municipality: {city}
+Administrative Region: {region}
+Country: {country}
+"""
+
 REFLECT_PROMPT = """
 ## ROLE
 You are a research quality assurance specialist for municipal planning feasibility studies.
@@ -260,9 +275,6 @@ You are a research quality assurance specialist for municipal planning feasibili
 ## OBJECTIVE
 Analyze research coverage and identify gaps requiring additional targeted investigation.
 
-## CURRENT RESEARCH STATUS
-{coverage}
-
 ## ANALYSIS FRAMEWORK
 Evaluate research completeness across three critical dimensions:
 
@@ -310,6 +322,11 @@ Return structured JSON with:
 - Include site-specific targeting where applicable
 """
 
+REFLECT_INPUT = """
+## CURRENT RESEARCH STATUS
+{coverage}
+"""
+
 SYNTH_PROMPT = """
 ## ROLE
 You are a senior municipal planning consultant preparing a comprehensive feasibility assessment for land-use change proposals.
@@ -413,6 +430,54 @@ Example: [e003: waterloo.ca/zoning-bylaw] or [e007: ontario.ca/official-plan]
 - Balance comprehensiveness with conciseness
 """
 
+FEASIBILITY_PROMPT = """
+## TASK
+Evaluate if a specific development proposal can be implemented through normal approval processes, or if there are absolute prohibitions that make it impossible.
+
+## DECISION FRAMEWORK
+Answer YES unless you find EXPLICIT, SITE-SPECIFIC PROHIBITIONS that make the development impossible.
+
+### ANSWER NO ONLY IF YOU FIND:
+
+**ABSOLUTE PROHIBITIONS AT THIS EXACT LOCATION:**
+- Title/deed restrictions stating "no commercial development" or "no construction"
+- Court orders specifically prohibiting development at this address
+- Conservation authority stating "development is prohibited" for this specific parcel
+- Utility company official statement: "service cannot be provided" to this location
+- Municipal zoning stating this use is "prohibited" (not just requiring approval)
+
+### ANSWER YES FOR EVERYTHING ELSE INCLUDING:
+- Need for zoning amendments, variances, or site plan approval (normal process)
+- Environmental studies and permits required (normal process) 
+- Heritage permits needed (normal process)
+- Utility upgrades or connection agreements needed (normal process)
+- General policy discussions without site-specific prohibitions
+- Requirements for traffic studies, parking plans, etc. (normal process)
+
+### IMPORTANT NOTES:
+- IGNORE general regulatory information unless it specifically prohibits this exact location
+- IGNORE requirements for approvals, permits, or studies - these are normal processes
+- ONLY reject if evidence shows this specific development is explicitly impossible/prohibited
+- When in doubt, answer YES (feasible through approval process)
+
+## OUTPUT FORMAT
+You MUST return ONLY valid JSON in this exact format (no markdown, no extra text):
+{"decision": "YES" or "NO", "reasoning": "brief explanation focusing on any prohibitions found or confirming feasibility", "evidence_cited": ["e001", "e002"]}
+
+CRITICAL: Return ONLY the JSON object, no markdown formatting like **Decision:** or ```json blocks.
+"""
+
+FEASIBILITY_INPUT = """
+## HYPOTHESIS TO EVALUATE
+Title: {title}
+Description: {description}
+Rationale: {rationale}
+Category: {category}
+
+## COLLECTED EVIDENCE
+{evidence_context}
+"""
+
 # ---------- Fallback Query Templates ----------
 def get_fallback_queries(site: str, city: str, region: str) -> List[str]:
     """Generate fallback queries when LLM is unavailable."""
@@ -1,15 +1,19 @@
 
 import os, re, io, json, logging
 import time
+import threading
 from dataclasses import dataclass, asdict, field
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import requests
 from config import (
     TAVILY_API_KEY, GEMINI_API_KEY, COHERE_API_KEY, JINA_API_KEY,
-    MAX_URLS_PER_ROUND, MAX_ROUNDS,
+    MAX_URLS_PER_ROUND, MAX_ROUNDS, MAX_EVIDENCE_ITEMS,
+    SEMANTIC_CACHE, SEMANTIC_CACHE_MODEL, SEMANTIC_CACHE_THRESHOLD,
     PARSE_LOCALE_PROMPT, HYPOTHESIS_GENERATION_PROMPT, PLANNER_PROMPT, REFLECT_PROMPT, SYNTH_PROMPT,
+    FEASIBILITY_PROMPT,
+    PARSE_LOCALE_INPUT, HYPOTHESIS_GENERATION_INPUT, PLANNER_INPUT, REFLECT_INPUT, FEASIBILITY_INPUT,
     get_fallback_queries, get_site_restricted_queries
 )
 
@@ -31,6 +35,12 @@ try:
 except Exception:
     HAVE_PDFPLUMBER = False
 
+try:
+    import orjson
+    HAVE_ORJSON = True
+except Exception:
+    HAVE_ORJSON = False
+
 try:
     from google import genai
     client = genai.Client()
@@ -106,12 +116,13 @@ def parse_locale(question: str, answer: str, api_provider: str = "gemini") -> Di
     country = ""
     
     try:
-        prompt = fill_prompt(PARSE_LOCALE_PROMPT, {"question": question, "answer": answer})
+        prompt = fill_prompt(PARSE_LOCALE_INPUT, {"question": question, "answer": answer})
 
         if api_provider == "gemini" and HAVE_GEMINI and GEMINI_API_KEY:
             response = client.models.generate_content(
                 model="gemini-2.5-flash", 
-                contents=prompt
+                contents=prompt,
+                config={"system_instruction": PARSE_LOCALE_PROMPT}
             )
 
             text = (getattr(response, "text", None) or "")
@@ -119,7 +130,7 @@ def parse_locale(question: str, answer: str, api_provider: str = "gemini") -> Di
         elif api_provider == "cohere" and HAVE_COHERE and COHERE_API_KEY:
             response = co.chat(
                 model="command-a-03-2025", 
-                messages=[{"role":"user","content": prompt}]
+                messages=[{"role":"system","content": PARSE_LOCALE_PROMPT}, {"role":"user","content": prompt}]
             )
 
             parts = getattr(getattr(response, "message", None), "content", []) or []
@@ -144,7 +155,7 @@ def parse_locale(question: str, answer: str, api_provider: str = "gemini") -> Di
 def generate_hypotheses(user_feedback: str, site: str, city: str, region: str, country: str, api_provider: str = "gemini") -> List[Hypothesis]:
     """Generate hypotheses for potential improvements based on user feedback."""
     try:
-        prompt = fill_prompt(HYPOTHESIS_GENERATION_PROMPT, {
+        prompt = fill_prompt(HYPOTHESIS_GENERATION_INPUT, {
             "user_feedback": user_feedback,
             "site": site,
             "city": city,
@@ -158,7 +169,8 @@ def generate_hypotheses(user_feedback: str, site: str, city: str, region: str, c
         if api_provider == "gemini" and HAVE_GEMINI and GEMINI_API_KEY:
             resp = client.models.generate_content(
                 model="gemini-2.5-flash", 
-                contents=prompt
+                contents=prompt,
+                config={"system_instruction": HYPOTHESIS_GENERATION_PROMPT}
             )
             t = (getattr(resp, "text", None) or "")
             logging.info("[hypotheses] Gemini response length: %d", len(t))
@@ -166,7 +178,7 @@ def generate_hypotheses(user_feedback: str, site: str, city: str, region: str, c
         elif api_provider == "cohere" and HAVE_COHERE and COHERE_API_KEY:
             resp = co.chat(
                 model="command-a-03-2025", 
-                messages=[{"role":"user","content": prompt}]
+                messages=[{"role":"system","content": HYPOTHESIS_GENERATION_PROMPT}, {"role":"user","content": prompt}]
             )
             
             parts = getattr(getattr(resp, "message", None), "content", []) or []
@@ -247,10 +259,16 @@ def extract_with_jina(url_data: Dict, max_retries: int = 2) -> str:
         try:
             jina_url = f"https://r.jina.ai/{url}"
             headers = {"Authorization": f"Bearer {JINA_API_KEY}"} if JINA_API_KEY else {}
-            response = requests.get(jina_url, headers=headers, timeout=30)
-            response.raise_for_status()
+            # Stream the body and stop at a byte budget instead of decoding multi-MB pages in full
+            with requests.get(jina_url, headers=headers, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                buf = bytearray()
+                for chunk in response.iter_content(65536):
+                    buf += chunk
+                    if len(buf) >= 24000:
+                        break
             logging.info("[jina] Successfully extracted content from %s", url)
-            return response.text[:20000]
+            return buf.decode("utf-8", "replace")[:20000]
         except Exception as e:
             logging.warning("[jina] Attempt %d/%d - Error extracting content from %s: %s", attempt + 1, max_retries + 1, url, e)
             if attempt < max_retries:
@@ -284,12 +302,14 @@ def fetch_pdf_text(url: str) -> Tuple[str, str]:
 # ---------- Plan / Search / Read / Evaluate / Reflect ----------
 def plan_queries(topic: str, site: str, city: str, region: str, country: str, api_provider: str = "gemini") -> List[str]:
     try:
-        prompt = fill_prompt(PLANNER_PROMPT, {"topic": topic, "site": site, "city": city, "region": region, "country": country})
+        prompt = fill_prompt(PLANNER_INPUT, {"topic": topic, "site": site, "city": city, "region": region, "country": country})
         if api_provider == "gemini" and HAVE_GEMINI and GEMINI_API_KEY:
-            resp = client.models.generate_content(model="gemini-2.5-flash", contents=prompt)
+            resp = client.models.generate_content(model="gemini-2.5-flash", contents=prompt,
+                                                  config={"system_instruction": PLANNER_PROMPT})
             t = (getattr(resp, "text", None) or "")
         elif api_provider == "cohere" and HAVE_COHERE and COHERE_API_KEY:
-            resp = co.chat(model="command-a-03-2025", messages=[{"role":"user","content": prompt}])
+            resp = co.chat(model="command-a-03-2025", messages=[{"role":"system","content": PLANNER_PROMPT},
+                                                                {"role":"user","content": prompt}])
             parts = getattr(getattr(resp, "message", None), "content", []) or []
             t = "\n".join([getattr(p, "text", "") for p in parts if getattr(p, "type", "text") == "text"]) or ""
         else:
@@ -373,7 +393,18 @@ def evaluate_evidence_completeness(evs: List[Evidence]) -> Tuple[bool, List[str]
     logging.info("[eval] complete=%s notes=%s", complete, notes)
     return complete, notes
 
-def reflect_and_update(queries: List[str], evs: List[Evidence], site: str, city: str, api_provider: str = "gemini") -> Tuple[List[str], List[str]]:
+def _merge_queries(queries: List[str], extra: List[str], seen_queries: set) -> List[str]:
+    """Append unseen queries in place, keeping `seen_queries` in sync."""
+    for q in extra:
+        if q not in seen_queries:
+            seen_queries.add(q)
+            queries.append(q)
+    return queries
+
+def reflect_and_update(queries: List[str], evs: List[Evidence], site: str, city: str, api_provider: str = "gemini",
+                       seen_queries: Optional[set] = None) -> Tuple[List[str], List[str]]:
+    if seen_queries is None:
+        seen_queries = set(queries)
     payload = {
         "evidence_count": len(evs),
         "evidence_types": [e.locator for e in evs],
@@ -382,12 +413,14 @@ def reflect_and_update(queries: List[str], evs: List[Evidence], site: str, city:
         "urls_found": [e.url for e in evs[:10]]  # Sample of URLs
     }
     try:
-        prompt = fill_prompt(REFLECT_PROMPT, {"coverage": json.dumps(payload)})
+        prompt = fill_prompt(REFLECT_INPUT, {"coverage": json.dumps(payload)})
         if api_provider == "gemini" and HAVE_GEMINI and GEMINI_API_KEY:
-            resp = client.models.generate_content(model="gemini-2.5-flash", contents=prompt)
+            resp = client.models.generate_content(model="gemini-2.5-flash", contents=prompt,
+                                                  config={"system_instruction": REFLECT_PROMPT})
             t = (getattr(resp, "text", None) or "")
         elif api_provider == "cohere" and HAVE_COHERE and COHERE_API_KEY:
-            resp = co.chat(model="command-a-03-2025", messages=[{"role":"user","content": prompt}])
+            resp = co.chat(model="command-a-03-2025", messages=[{"role":"system","content": REFLECT_PROMPT},
+                                                                {"role":"user","content": prompt}])
             parts = getattr(getattr(resp, "message", None), "content", []) or []
             t = "\n".join([getattr(p, "text", "") for p in parts if getattr(p, "type", "text") == "text"]) or ""
         else:
@@ -396,14 +429,14 @@ def reflect_and_update(queries: List[str], evs: List[Evidence], site: str, city:
             js = json.loads(t[t.find("{"):t.rfind("}")+1])
             new_q = js.get("new_queries", [])
             notes = js.get("notes", [])
-            merged=list(dict.fromkeys(queries + new_q))
+            merged = _merge_queries(queries, new_q, seen_queries)
             logging.info("[reflect] added %d new queries; total=%d", len(new_q), len(merged))
             return merged[:12], notes
     except Exception as e:
         logging.exception("[reflect] LLM failed: %s", e)
     # fallback: add site-restricted queries for common official domains
     extras = get_site_restricted_queries(site, city)
-    merged=list(dict.fromkeys(queries+extras))
+    merged = _merge_queries(queries, extras, seen_queries)
     logging.warning("[reflect] fallback added %d queries; total=%d", len(extras), len(merged))
     return merged[:12], ["Added site-restricted queries (fallback)"]
 
@@ -413,12 +446,14 @@ def synthesize(topic, site, city, region, country, evs: List[Evidence], hypothes
     payload={"topic":topic, "site":site, "city":city, "region":region, "country":country,
              "evidence":[asdict(e) for e in evs], "hypotheses":hypotheses, "demand_metrics":demand}
     try:
-        full_prompt = SYNTH_PROMPT+"\n\nINPUT JSON:\n"+json.dumps(payload)[:120000]
+        prompt = "INPUT JSON:\n"+json.dumps(payload)[:120000]
         if api_provider == "gemini" and HAVE_GEMINI and GEMINI_API_KEY:
-            resp = client.models.generate_content(model="gemini-2.5-flash", contents=full_prompt)
+            resp = client.models.generate_content(model="gemini-2.5-flash", contents=prompt,
+                                                  config={"system_instruction": SYNTH_PROMPT})
             t = (getattr(resp, "text", None) or "")
         elif api_provider == "cohere" and HAVE_COHERE and COHERE_API_KEY:
-            resp = co.chat(model="command-a-03-2025", messages=[{"role":"user","content": full_prompt}])
+            resp = co.chat(model="command-a-03-2025", messages=[{"role":"system","content": SYNTH_PROMPT},
+                                                                {"role":"user","content": prompt}])
             parts = getattr(getattr(resp, "message", None), "content", []) or []
             t = "\n".join([getattr(p, "text", "") for p in parts if getattr(p, "type", "text") == "text"]) or ""
         else:
@@ -438,63 +473,56 @@ def synthesize(topic, site, city, region, country, evs: List[Evidence], hypothes
     logging.warning("[synth] LLM unavailable -> fallback brief")
     return json.dumps({"hypotheses":hypotheses,"demand_metrics":demand},indent=2), "# Brief unavailable"
 
+# Prohibition language (unless negated, e.g. "not prohibited") and a development subject must
+# both appear somewhere in the evidence before the LLM judge can possibly answer NO.
+TRIGGER_RX = re.compile(
+    r"(?P<negation>\bnot\s+(?:be\s+)?)?"
+    r"(?P<prohibit>\bprohibit\w*|\bforbid\w*|\bnot\s+permitted|\bshall\s+not|\bcannot\s+be\s+provided)"
+    r"|(?P<blanket>\bno\s+(?:commercial\s+)?(?:development|construction)\b)"
+    r"|(?P<subject>\b(?:development|construction|building|zoning|commercial|uses?)\b)",
+    re.IGNORECASE,
+)
+
+def has_prohibition_trigger(text: str) -> bool:
+    """Single regex pass checking for a non-negated prohibition plus a development subject."""
+    prohibit = subject = False
+    for m in TRIGGER_RX.finditer(text):
+        if m.group("prohibit"):
+            prohibit = prohibit or not m.group("negation")
+        elif m.group("blanket"):
+            prohibit = subject = True
+        else:
+            subject = True
+        if prohibit and subject:
+            return True
+    return False
+
 def evaluate_hypothesis_feasibility(hypothesis: Hypothesis, evidence: List[Evidence], api_provider: str = "gemini") -> Tuple[str, str]:
     """Evaluate a single hypothesis and return YES/NO decision with reasoning."""
     try:
+        # Deterministic pre-filter: without any prohibition language the framework always answers YES
+        if not any(has_prohibition_trigger(e.snippet) for e in evidence[:MAX_EVIDENCE_ITEMS]):
+            logging.info("[hypothesis] YES (no prohibition language in evidence): %s", hypothesis.title)
+            return "YES", "No prohibition language found in collected evidence; feasible through normal approval processes"
+
         # Create context from relevant evidence
-        evidence_context = "\n\n".join([f"[{e.id}] {e.title}: {e.snippet}" for e in evidence[:15]])
+        evidence_context = "\n\n".join([f"[{e.id}] {e.title}: {e.snippet}" for e in evidence[:MAX_EVIDENCE_ITEMS]])
         
-        prompt = f"""
-## TASK
-Evaluate if a specific development proposal can be implemented through normal approval processes, or if there are absolute prohibitions that make it impossible.
-
-## HYPOTHESIS TO EVALUATE
-Title: {hypothesis.title}
-Description: {hypothesis.description}
-Rationale: {hypothesis.rationale}
-Category: {hypothesis.category}
-
-## COLLECTED EVIDENCE
-{evidence_context}
-
-## DECISION FRAMEWORK
-Answer YES unless you find EXPLICIT, SITE-SPECIFIC PROHIBITIONS that make the development impossible.
-
-### ANSWER NO ONLY IF YOU FIND:
-
-**ABSOLUTE PROHIBITIONS AT THIS EXACT LOCATION:**
-- Title/deed restrictions stating "no commercial development" or "no construction"
-- Court orders specifically prohibiting development at this address
-- Conservation authority stating "development is prohibited" for this specific parcel
-- Utility company official statement: "service cannot be provided" to this location
-- Municipal zoning stating this use is "prohibited" (not just requiring approval)
-
-### ANSWER YES FOR EVERYTHING ELSE INCLUDING:
-- Need for zoning amendments, variances, or site plan approval (normal process)
-- Environmental studies and permits required (normal process) 
-- Heritage permits needed (normal process)
-- Utility upgrades or connection agreements needed (normal process)
-- General policy discussions without site-specific prohibitions
-- Requirements for traffic studies, parking plans, etc. (normal process)
-
-### IMPORTANT NOTES:
-- IGNORE general regulatory information unless it specifically prohibits this exact location
-- IGNORE requirements for approvals, permits, or studies - these are normal processes
-- ONLY reject if evidence shows this specific development is explicitly impossible/prohibited
-- When in doubt, answer YES (feasible through approval process)
-
-## OUTPUT FORMAT
-You MUST return ONLY valid JSON in this exact format (no markdown, no extra text):
-{{"decision": "YES" or "NO", "reasoning": "brief explanation focusing on any prohibitions found or confirming feasibility", "evidence_cited": ["e001", "e002"]}}
-
-CRITICAL: Return ONLY the JSON object, no markdown formatting like **Decision:** or ```json blocks.
-"""
+        prompt = fill_prompt(FEASIBILITY_INPUT, {
+            "title": hypothesis.title,
+            "description": hypothesis.description,
+            "rationale": hypothesis.rationale,
+            "category": hypothesis.category,
+            "evidence_context": evidence_context
+        })
         
         if api_provider == "gemini" and HAVE_GEMINI and GEMINI_API_KEY:
-            resp = client.models.generate_content(model="gemini-2.5-flash", contents=prompt)
+            resp = client.models.generate_content(model="gemini-2.5-flash", contents=prompt,
+                                                  config={"system_instruction": FEASIBILITY_PROMPT})
             t = (getattr(resp, "text", None) or "")
         elif api_provider == "cohere" and HAVE_COHERE and COHERE_API_KEY:
-            resp = co.chat(model="command-a-03-2025", messages=[{"role":"user","content": prompt}])
+            resp = co.chat(model="command-a-03-2025", messages=[{"role":"system","content": FEASIBILITY_PROMPT},
+                                                                {"role":"user","content": prompt}])
             parts = getattr(getattr(resp, "message", None), "content", []) or []
             t = "\n".join([getattr(p, "text", "") for p in parts if getattr(p, "type", "text") == "text"]) or ""
         else:
@@ -543,15 +571,96 @@ CRITICAL: Return ONLY the JSON object, no markdown formatting like **Decision:**
     # Fallback: conservative NO
     return "NO", "Evaluation failed - insufficient evidence"
 
+# ---------- Semantic verdict cache ----------
+_embedder = None
+_embedder_lock = threading.Lock()
+# Verdict caches are per run (built in run_open_research, so concurrent runs never share one):
+# lists of (evidence key, normalized embedding, (decision, reasoning))
+
+def _embed(text: str):
+    """Lazily load the sentence-transformer and return a unit-norm embedding."""
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            from sentence_transformers import SentenceTransformer
+            _embedder = SentenceTransformer(SEMANTIC_CACHE_MODEL)
+            logging.info("[cache] Loaded embedding model %s", SEMANTIC_CACHE_MODEL)
+    return _embedder.encode(text, normalize_embeddings=True)
+
+def _evidence_key(evidence: List[Evidence], locale: str = "") -> Tuple:
+    """Identity of the evidence a verdict was judged against (locale + the judge's evidence window)."""
+    return (locale,) + tuple((e.id, e.url) for e in evidence[:MAX_EVIDENCE_ITEMS])
+
+def evaluate_hypothesis_cached(hypothesis: Hypothesis, evidence: List[Evidence], api_provider: str = "gemini",
+                               cache: Optional[List] = None, locale: str = "") -> Tuple[str, str]:
+    """Reuse a verdict from `cache` when a near-duplicate hypothesis was judged against the same evidence."""
+    if not SEMANTIC_CACHE or cache is None:
+        return evaluate_hypothesis_feasibility(hypothesis, evidence, api_provider)
+    text = f"{hypothesis.title}\n{hypothesis.description}"
+    try:
+        vec = _embed(text)
+    except Exception as e:
+        logging.warning("[cache] Embedding unavailable, calling LLM directly: %s", e)
+        return evaluate_hypothesis_feasibility(hypothesis, evidence, api_provider)
+
+    key = _evidence_key(evidence, locale)
+    for cached_key, cached_vec, verdict in list(cache):
+        if cached_key == key and float(vec @ cached_vec) >= SEMANTIC_CACHE_THRESHOLD:
+            logging.info("[cache] Reusing verdict for '%s'", hypothesis.title)
+            return verdict
+
+    decision, reasoning = evaluate_hypothesis_feasibility(hypothesis, evidence, api_provider)
+    if not reasoning.startswith("Evaluation failed"):
+        cache.append((key, vec, (decision, reasoning)))
+    return decision, reasoning
+
+# ---------- Persistence ----------
+def _dump_json_bytes(obj) -> bytes:
+    """Compact JSON for machine-read outputs (no indent)."""
+    if HAVE_ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+def append_jsonl(path: str, rows: List[Dict]) -> None:
+    """Append one JSON object per line so readers can parse only the new tail."""
+    if not rows:
+        return
+    with open(path, "ab") as f:
+        f.write(b"".join(_dump_json_bytes(r) + b"\n" for r in rows))
+
+def write_outputs(out_dir: str, base_name: str, evidence: List[Evidence], rounds: List[RoundTrace], js: str, md: str) -> None:
+    """
+    Write evidence/rounds, then the report files (whose presence marks the run done), each pair in parallel.
+    Each file is written to <name>.tmp and renamed into place, so readers never see a partial file.
+    """
+    def write(name: str, data: bytes):
+        path = os.path.join(out_dir, name)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+    phases = [
+        {base_name + ".evidence.json": _dump_json_bytes([asdict(e) for e in evidence]),
+         base_name + ".rounds.json": _dump_json_bytes([asdict(r) for r in rounds])},
+        {base_name + ".report.json": js.encode("utf-8"),
+         base_name + ".report.md": md.encode("utf-8")},
+    ]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for files in phases:
+            for fut in [executor.submit(write, name, data) for name, data in files.items()]:
+                fut.result()
+
 # ---------- Orchestrator ----------
 def run_open_research(question: str, user_answer: str, topic: str, out_prefix: str, api_provider: str = "cohere") -> ReportBundle:
     logging.info("[research] Starting open research...")
+    verdict_cache: List[Tuple[Tuple, object, Tuple[str, str]]] = []
     
     # 1) Parse locale
     logging.info("[research] Step 1: Parsing locale...")
     loc = parse_locale(question, user_answer, api_provider)
     site, city, region, country = loc.get("site",""), loc.get("city",""), loc.get("region",""), loc.get("country","")
     logging.info("[research] Locale parsed: site=%s, city=%s, region=%s, country=%s", site, city, region, country)
+    locale_key = "|".join((site, city, region, country))
 
     # 2) Generate hypotheses and plan queries in parallel
     logging.info("[research] Step 2: Generating hypotheses and planning queries in parallel...")
@@ -567,10 +676,20 @@ def run_open_research(question: str, user_answer: str, topic: str, out_prefix: s
     
     logging.info("[research] Parallel setup complete: %d hypotheses, %d queries", len(hypotheses), len(queries))
 
+# changed to data directory
+    out_dir = "data"   # change this to your desired directory
+    os.makedirs(out_dir, exist_ok=True)
+
+    base_name = os.path.basename(out_prefix) if out_prefix else "output"
+    # Evidence is streamed to a JSONL sidecar each round so readers can follow progress
+    evidence_log = os.path.join(out_dir, base_name + ".evidence.jsonl")
+    open(evidence_log, "wb").close()
+
     # 4) Iterate rounds: Search -> Collect -> Evaluate -> Reflect
     all_evidence: List[Evidence] = []
     rounds: List[RoundTrace] = []
     used_urls=set()
+    seen_queries=set(queries)
 
     for rnd in range(1, MAX_ROUNDS+1):
         logging.info("=== ROUND %d ===", rnd)
@@ -580,20 +699,22 @@ def run_open_research(question: str, user_answer: str, topic: str, out_prefix: s
 
         evs = collect_evidence(url_items, start_id=len(all_evidence)+1)
         all_evidence.extend(evs)
+        append_jsonl(evidence_log, [asdict(e) for e in evs])
 
         complete, eval_notes = evaluate_evidence_completeness(all_evidence)
         rounds.append(RoundTrace(round_id=rnd, queries=queries[:], urls_fetched=len(url_items),
                                  evidence_ids=[e.id for e in evs], reflect_notes=eval_notes))
         if complete or rnd==MAX_ROUNDS:
             break
-        queries, rnotes = reflect_and_update(queries, all_evidence, site, city, api_provider)
+        queries, rnotes = reflect_and_update(queries, all_evidence, site, city, api_provider, seen_queries)
         rounds[-1].reflect_notes += rnotes
 
     # 5) Evaluate each hypothesis in parallel
     logging.info("[hypotheses] Evaluating %d hypotheses in parallel", len(hypotheses))
     
     def evaluate_single_hypothesis(hypothesis):
-        decision, reasoning = evaluate_hypothesis_feasibility(hypothesis, all_evidence, api_provider)
+        decision, reasoning = evaluate_hypothesis_cached(hypothesis, all_evidence, api_provider,
+                                                         cache=verdict_cache, locale=locale_key)
         hypothesis.feasibility_decision = decision
         hypothesis.decision_reasoning = reasoning
         logging.info("[hypothesis] %s: %s - %s", decision, hypothesis.title, reasoning[:100])
@@ -614,24 +735,8 @@ def run_open_research(question: str, user_answer: str, topic: str, out_prefix: s
     # 6) Generate final report
     js, md = synthesize(topic, site, city, region, country, all_evidence, [asdict(h) for h in hypotheses], {}, api_provider)
 
-    # Persist - use current directory if no directory specifies
-
-
-
-# changed to data directory
-    out_dir = "data"   # change this to your desired directory
-    os.makedirs(out_dir, exist_ok=True)
-
-    base_name = os.path.basename(out_prefix) if out_prefix else "output"
-
-    with open(os.path.join(out_dir, base_name + ".evidence.json"), "w", encoding="utf-8") as f:
-        json.dump([asdict(e) for e in all_evidence], f, indent=2)
-    with open(os.path.join(out_dir, base_name + ".rounds.json"), "w", encoding="utf-8") as f:
-        json.dump([asdict(r) for r in rounds], f, indent=2)
-    with open(os.path.join(out_dir, base_name + ".report.json"), "w", encoding="utf-8") as f:
-        f.write(js)
-    with open(os.path.join(out_dir, base_name + ".report.md"), "w", encoding="utf-8") as f:
-        f.write(md)
+    # Persist
+    write_outputs(out_dir, base_name, all_evidence, rounds, js, md)
 
     logging.info("[done] wrote %s/{evidence,rounds,report}.{json,md}", os.path.join(out_dir, base_name))
     return ReportBundle(topic=topic, site=site, city=city, region=region, country=country,
@@ -667,9 +772,14 @@ if __name__ == "__main__":
     import sys
     logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
     
+    # Optional flags
+    if "--semantic-cache" in sys.argv:
+        sys.argv.remove("--semantic-cache")
+        SEMANTIC_CACHE = True
+
     # Get parameters from command line arguments
     if len(sys.argv) < 4:
-        print("Usage: python deep_research_pipeline.py <user_answer> <topic> <out_prefix> [api_provider]")
+        print("Usage: python deep_research_pipeline.py <user_answer> <topic> <out_prefix> [api_provider] [--semantic-cache]")
         sys.exit(1)
     
     user_answer = sys.argv[1]
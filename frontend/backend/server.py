@@ -1,18 +1,61 @@
 # server.py
 import os
-import glob
+import io
 import json
+import mmap
 import time
-import shlex
 import requests
-import subprocess
+from requests.adapters import HTTPAdapter
 import threading
-from flask import Flask, request, jsonify
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 
+try:
+    import orjson
+    HAVE_ORJSON = True
+except ImportError:
+    HAVE_ORJSON = False
+
+def _dumps(obj) -> bytes:
+    return orjson.dumps(obj) if HAVE_ORJSON else json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+def _loads(data):
+    if HAVE_ORJSON:
+        return orjson.loads(data)  # accepts any buffer, including a memoryview over an mmap
+    return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+# Below this size a plain read() is cheaper than setting up a mapping
+_MMAP_MIN_SIZE = 16 * 1024
+
+def _read_file(path: str, size: int, decode):
+    """
+    Apply decode() to the file's bytes. Large files are mmapped and handed to
+    decode() as a memoryview, so parsing/decoding reads the page cache directly
+    instead of going through an intermediate read() copy.
+    """
+    with open(path, "rb") as f:
+        if size < _MMAP_MIN_SIZE:
+            return decode(f.read())
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            view = memoryview(mm)
+            try:
+                return decode(view)
+            finally:
+                view.release()
+        finally:
+            mm.close()
+
 COHERE_API_KEY = os.environ.get("COHERE_API_KEY")
 COHERE_MODEL   = os.environ.get("COHERE_MODEL", "command-r-plus-08-2024")
 
+# Shared session so Cohere calls reuse pooled keep-alive connections instead of
+# a fresh DNS + TCP + TLS handshake per chat request
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=50))
+
 # Folder that contains analytics_data.json and report outputs
 DATA_DIR = os.environ.get("DATA_DIR", "./data")
 ENV_REPORT_PATH = os.environ.get("REPORT_PATH")  # optional absolute override
@@ -20,6 +63,69 @@ ENV_REPORT_PATH = os.environ.get("REPORT_PATH")  # optional absolute override
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
+# ---------- Report index ----------
+# Per-directory list of (name, path, mtime) for *.report.md, sorted by name.
+# Rescanned only when the directory's mtime changes (reports are created or
+# renamed into place, which bumps it).
+_REPORT_CACHE: dict[str, tuple[int, list[tuple[str, str, float]]]] = {}
+# path -> (mtime, size, content)
+_REPORT_CONTENT: dict[str, tuple[float, int, str]] = {}
+_REPORT_LOCK = threading.Lock()
+
+def _report_entries(data_dir: str):
+    """Cached *.report.md entries of data_dir (empty if it doesn't exist)."""
+    try:
+        dir_mtime = os.stat(data_dir).st_mtime_ns
+    except OSError:
+        return []
+    with _REPORT_LOCK:
+        cached = _REPORT_CACHE.get(data_dir)
+        if cached and cached[0] == dir_mtime:
+            return cached[1]
+        entries = []
+        with os.scandir(data_dir) as it:
+            for e in it:
+                if e.name.endswith(".report.md") and not e.name.startswith("."):
+                    entries.append((e.name, e.path, e.stat(follow_symlinks=False).st_mtime))
+        entries.sort()
+        _REPORT_CACHE[data_dir] = (dir_mtime, entries)
+        return entries
+
+# (data_dir, prefix) -> (entries list it was computed from, newest path)
+_LATEST_CACHE: dict[tuple[str, str | None], tuple[list, str | None]] = {}
+
+def _latest_report(prefix: str | None, data_dir: str = DATA_DIR):
+    """
+    Path of the newest report in data_dir (optionally starting with prefix), or
+    None. One pass over the cached DirEntry mtimes; the answer is reused until
+    the directory is rescanned (which produces a new entries list).
+    """
+    entries = _report_entries(data_dir)
+    cached = _LATEST_CACHE.get((data_dir, prefix))
+    if cached and cached[0] is entries:
+        return cached[1]
+    best_mtime, best = -1.0, None
+    for name, path, mtime in entries:
+        if prefix and not name.startswith(prefix):
+            continue
+        if mtime > best_mtime:
+            best_mtime, best = mtime, path
+    if len(_LATEST_CACHE) >= 256:  # prefixes come from query strings; keep it bounded
+        _LATEST_CACHE.clear()
+    _LATEST_CACHE[(data_dir, prefix)] = (entries, best)
+    return best
+
+def _read_report(path: str) -> str:
+    """Report contents, re-read only when the file's mtime or size changes."""
+    st = os.stat(path)
+    cached = _REPORT_CONTENT.get(path)
+    if cached and cached[0] == st.st_mtime and cached[1] == st.st_size:
+        return cached[2]
+    content = _read_file(path, st.st_size, lambda buf: str(buf, "utf-8"))
+    with _REPORT_LOCK:
+        _REPORT_CONTENT[path] = (st.st_mtime, st.st_size, content)
+    return content
+
 @app.get("/api/health")
 def health():
     return {"ok": True, "cohereKey": bool(COHERE_API_KEY)}
@@ -43,17 +149,10 @@ def get_report_legacy():
 
         report_content = None
         for data_dir in possible_dirs:
-            if os.path.exists(data_dir):
-                if prefix:
-                    report_files = glob.glob(os.path.join(data_dir, f"{prefix}*.report.md"))
-                else:
-                    report_files = glob.glob(os.path.join(data_dir, "*.report.md"))
-
-                if report_files:
-                    latest_report = max(report_files, key=os.path.getmtime)
-                    with open(latest_report, "r", encoding="utf-8") as f:
-                        report_content = f.read()
-                    break
+            latest_report = _latest_report(prefix, data_dir)
+            if latest_report:
+                report_content = _read_report(latest_report)
+                break
 
         if report_content:
             return {"exists": True, "markdown": report_content}
@@ -84,7 +183,7 @@ def cohere_chat():
     joined = "\n".join(convo_lines) or "Hello!"
 
     try:
-        r = requests.post(
+        r = _SESSION.post(
             "https://api.cohere.ai/v1/chat",
             headers={
                 "Authorization": f"Bearer {COHERE_API_KEY}",
@@ -111,25 +210,22 @@ def _find_report_path(prefix: str | None):
     if ENV_REPORT_PATH and os.path.exists(ENV_REPORT_PATH):
         return ENV_REPORT_PATH
 
-    patterns = []
+    entries = _report_entries(DATA_DIR)
     if prefix:
-        patterns.append(os.path.join(DATA_DIR, f"{prefix}*.report.md"))
-    patterns.append(os.path.join(DATA_DIR, "*.report.md"))
+        for name, path, _ in entries:
+            if name.startswith(prefix):
+                return path
+    if entries:
+        return entries[0][1]
 
-    for pat in patterns:
-        matches = sorted(glob.glob(pat))
-        if matches:
-            return matches[0]
-
-    raise FileNotFoundError(f"No report matching {patterns} in {DATA_DIR}")
+    raise FileNotFoundError(f"No report matching {prefix or ''}*.report.md in {DATA_DIR}")
 
 def load_report(prefix: str | None):
     try:
         path = _find_report_path(prefix)
+        return _read_report(path)
     except FileNotFoundError:
         return None
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
 
 # This is the primary report route your frontend should use.
 @app.get("/api/report")
@@ -140,122 +236,167 @@ def api_report():
         return jsonify({"exists": False, "markdown": ""}), 404
     return jsonify({"exists": True, "markdown": md})
 
+def _report_bullets(content: str, limit: int = 5):
+    """First `limit` markdown bullets, scanning lines lazily and stopping early."""
+    bullets = []
+    for line in io.StringIO(content):
+        s = line.strip()
+        if s.startswith("-") or s.startswith("*"):
+            bullets.append(s[1:].strip())
+            if len(bullets) >= limit:
+                break
+    return bullets
+
+# path -> (report content the body was built from, serialized status body)
+_STATUS_CACHE: dict[str, tuple[str, bytes]] = {}
+
 @app.get("/api/research/status")
 def research_status():
     """Check if research data exists and return a quick summary."""
     prefix = request.args.get("prefix") or None
 
     try:
-        if prefix:
-            report_files = glob.glob(os.path.join(DATA_DIR, f"{prefix}*.report.md"))
-        else:
-            report_files = glob.glob(os.path.join(DATA_DIR, "*.report.md"))
-
-        if report_files:
-            latest_report = max(report_files, key=os.path.getmtime)
-            with open(latest_report, "r", encoding="utf-8") as f:
-                report_content = f.read()
-
-            lines = report_content.split("\n")
-            bullets = []
-            for line in lines:
-                s = line.strip()
-                if s.startswith("-") or s.startswith("*"):
-                    bullets.append(s[1:].strip())
-                if len(bullets) >= 5:
-                    break
+        latest_report = _latest_report(prefix)
+        if latest_report:
+            report_content = _read_report(latest_report)
 
-            return jsonify({
+            # _read_report returns the same str until the file changes
+            cached = _STATUS_CACHE.get(latest_report)
+            if cached and cached[0] is report_content:
+                return Response(cached[1], mimetype="application/json")
+
+            bullets = _report_bullets(report_content)
+            body = _dumps({
                 "status": "complete",
                 "data": {
                     "type": "markdown_report",
                     "content": report_content,
                     "items": len(bullets),
                     "sites": 4,
-                    "bullets": bullets[:5],
+                    "bullets": bullets,
                     "sites_list": ["waterloo.ca", "ontario.ca", "grandriver.ca", "regionofwaterloo.ca"],
                 }
             })
+            _STATUS_CACHE[latest_report] = (report_content, body)
+            return Response(body, mimetype="application/json")
         else:
             return jsonify({"status": "no_data"})
 
     except Exception as e:
         return jsonify({"status": "error", "error": str(e)})
 
+# ---------- Analytics ----------
+def _fallback_analytics():
+    """Minimal generated data served when analytics_data.json is missing."""
+    time_points = list(range(0, 25, 1))
+    env1_data = [{"x": i, "y": 30 + i * 0.3} for i in time_points]
+    env2_data = [{"x": i, "y": 50 + i * 1.2} for i in time_points]
+    env3_data = [{"x": i, "y": 70 + i * 1.0} for i in time_points]
+    env4_data = [{"x": i, "y": 45 + i * 0.9} for i in time_points]
+
+    cost_env1 = [{"x": i, "y": 15 + i * 1.5} for i in time_points]
+    cost_env2 = [{"x": i, "y": 25 + i * 1.3} for i in time_points]
+    cost_env3 = [{"x": i, "y": 8 + i * 1.2} for i in time_points]
+    cost_env4 = [{"x": i, "y": 18 + i * 1.4} for i in time_points]
+
+    time_env1 = [{"x": i, "y": 2 + i * 0.3} for i in time_points]
+    time_env2 = [{"x": i, "y": 6 + i * 0.6} for i in time_points]
+    time_env3 = [{"x": i, "y": 12 + i * 1.5} for i in time_points]
+    time_env4 = [{"x": i, "y": 8 + i * 1.2} for i in time_points]
+
+    return {
+        "metrics": {
+            "efficiency": {
+                "env1": env1_data,
+                "env2": env2_data,
+                "env3": env3_data,
+                "env4": env4_data,
+                "label": "Efficiency %",
+                "color_env1": "#ef4444",
+                "color_env2": "#3b82f6",
+                "color_env3": "#10b981",
+                "color_env4": "#8b5cf6"
+            },
+            "cost": {
+                "env1": cost_env1,
+                "env2": cost_env2,
+                "env3": cost_env3,
+                "env4": cost_env4,
+                "label": "Cost Reduction %",
+                "color_env1": "#ef4444",
+                "color_env2": "#3b82f6",
+                "color_env3": "#10b981",
+                "color_env4": "#8b5cf6"
+            },
+            "time_saved": {
+                "env1": time_env1,
+                "env2": time_env2,
+                "env3": time_env3,
+                "env4": time_env4,
+                "label": "Time Saved (hours/month)",
+                "color_env1": "#ef4444",
+                "color_env2": "#3b82f6",
+                "color_env3": "#10b981",
+                "color_env4": "#8b5cf6"
+            }
+        },
+        "summary": {
+            "efficiency_improvement": "42%",
+            "cost_reduction": "68%",
+            "time_saved": "38 hours/month",
+            "overall_rating": "Excellent"
+        }
+    }
+
+@lru_cache(maxsize=1)
+def _fallback_payload() -> bytes:
+    """Serialized fallback, built on first use (not at import) and reused after."""
+    return _dumps(_fallback_analytics())
+
+# (path, st_mtime_ns, st_size) -> serialized body of the last analytics_data.json served
+_ANALYTICS_CACHE: tuple[tuple[str, int, int], bytes] | None = None
+
 @app.get("/api/analytics/data")
 def get_analytics_data():
     """Serve analytics data from DATA_DIR/analytics_data.json, or a simple fallback."""
+    global _ANALYTICS_CACHE
     try:
         json_file_path = os.path.join(DATA_DIR, "analytics_data.json")
-        if os.path.exists(json_file_path):
-            with open(json_file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return jsonify(data)
-        else:
-            # Fallback: minimal generated data if the file is missing
-            time_points = list(range(0, 25, 1))
-            env1_data = [{"x": i, "y": 30 + i * 0.3} for i in time_points]
-            env2_data = [{"x": i, "y": 50 + i * 1.2} for i in time_points]
-            env3_data = [{"x": i, "y": 70 + i * 1.0} for i in time_points]
-            env4_data = [{"x": i, "y": 45 + i * 0.9} for i in time_points]
-
-            cost_env1 = [{"x": i, "y": 15 + i * 1.5} for i in time_points]
-            cost_env2 = [{"x": i, "y": 25 + i * 1.3} for i in time_points]
-            cost_env3 = [{"x": i, "y": 8 + i * 1.2} for i in time_points]
-            cost_env4 = [{"x": i, "y": 18 + i * 1.4} for i in time_points]
-
-            time_env1 = [{"x": i, "y": 2 + i * 0.3} for i in time_points]
-            time_env2 = [{"x": i, "y": 6 + i * 0.6} for i in time_points]
-            time_env3 = [{"x": i, "y": 12 + i * 1.5} for i in time_points]
-            time_env4 = [{"x": i, "y": 8 + i * 1.2} for i in time_points]
-
-            return jsonify({
-                "metrics": {
-                    "efficiency": {
-                        "env1": env1_data,
-                        "env2": env2_data,
-                        "env3": env3_data,
-                        "env4": env4_data,
-                        "label": "Efficiency %",
-                        "color_env1": "#ef4444",
-                        "color_env2": "#3b82f6",
-                        "color_env3": "#10b981",
-                        "color_env4": "#8b5cf6"
-                    },
-                    "cost": {
-                        "env1": cost_env1,
-                        "env2": cost_env2,
-                        "env3": cost_env3,
-                        "env4": cost_env4,
-                        "label": "Cost Reduction %",
-                        "color_env1": "#ef4444",
-                        "color_env2": "#3b82f6",
-                        "color_env3": "#10b981",
-                        "color_env4": "#8b5cf6"
-                    },
-                    "time_saved": {
-                        "env1": time_env1,
-                        "env2": time_env2,
-                        "env3": time_env3,
-                        "env4": time_env4,
-                        "label": "Time Saved (hours/month)",
-                        "color_env1": "#ef4444",
-                        "color_env2": "#3b82f6",
-                        "color_env3": "#10b981",
-                        "color_env4": "#8b5cf6"
-                    }
-                },
-                "summary": {
-                    "efficiency_improvement": "42%",
-                    "cost_reduction": "68%",
-                    "time_saved": "38 hours/month",
-                    "overall_rating": "Excellent"
-                }
-            })
+        try:
+            st = os.stat(json_file_path)
+        except FileNotFoundError:
+            return Response(_fallback_payload(), mimetype="application/json")
+
+        key = (json_file_path, st.st_mtime_ns, st.st_size)
+        cached = _ANALYTICS_CACHE
+        if cached is None or cached[0] != key:
+            # Round-trip so the body is compact and known-valid JSON
+            body = _dumps(_read_file(json_file_path, st.st_size, _loads))
+            cached = _ANALYTICS_CACHE = (key, body)
+        return Response(cached[1], mimetype="application/json")
 
     except Exception as e:
         return jsonify({"error": f"Failed to load analytics data: {str(e)}"}), 500
 
+# ---------- Research pipeline ----------
+# Runs in-process on a bounded pool instead of spawning a Python per request
+_PIPELINE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="research")
+PIPELINE_QUESTION = "What area needs improvement and what problems do you see?"
+
+def _run_pipeline_job(space: str, user_input: str, topic: str, prefix: str):
+    # Imported lazily so the server starts without the pipeline's dependencies
+    from deep_research_pipeline import run_open_research
+
+    print(f"Starting research pipeline for: {space}")
+    print(f"Topic: {topic}")
+    print(f"User input: {user_input[:100]}...")
+    try:
+        run_open_research(PIPELINE_QUESTION, user_input, topic, prefix, "gemini")
+        print(f"Research completed successfully for {space}")
+    except Exception as e:
+        print(f"Error running research pipeline: {e}")
+        raise
+
 @app.post("/api/research/start")
 def start_research():
     """Start the deep research pipeline with user input (in a background thread)."""
@@ -271,42 +412,8 @@ def start_research():
         prefix = f"{space.lower().replace(' ', '_')}_{int(time.time())}"
 
         if run_pipeline:
-            def run_pipeline_thread():
-                try:
-                    topic = f"{space} optimization and development"
-                    escaped_user_input = shlex.quote(user_input)
-                    escaped_topic = shlex.quote(topic)
-                    escaped_prefix = shlex.quote(prefix)
-
-                    print(f"Starting research pipeline for: {space}")
-                    print(f"Topic: {topic}")
-                    print(f"User input: {user_input[:100]}...")
-
-                    result = subprocess.run(
-                        [
-                            "python", "deep_research_pipeline.py",
-                            escaped_user_input,
-                            escaped_topic,
-                            escaped_prefix,
-                            "gemini",
-                        ],
-                        capture_output=True,
-                        text=True,
-                        cwd=".",
-                    )
-
-                    if result.returncode == 0:
-                        print(f"Research completed successfully for {space}")
-                        print(f"Output: {result.stdout}")
-                    else:
-                        print(f"Research failed for {space}: {result.stderr}")
-                        print(f"Return code: {result.returncode}")
-
-                except Exception as e:
-                    print(f"Error running research pipeline: {e}")
-
-            thread = threading.Thread(target=run_pipeline_thread, daemon=True)
-            thread.start()
+            topic = f"{space} optimization and development"
+            _PIPELINE_POOL.submit(_run_pipeline_job, space, user_input, topic, prefix)
 
             return jsonify({
                 "success": True,
@@ -328,4 +435,15 @@ if __name__ == "__main__":
     #   export COHERE_API_KEY=...
     #   export DATA_DIR=./data
     #   python server.py
-    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5002)), debug=True)
+    #   FLASK_DEBUG=1 python server.py   # Werkzeug dev server with reloader
+    port = int(os.environ.get("PORT", 5002))
+    if os.environ.get("FLASK_DEBUG") == "1":
+        app.run(host="0.0.0.0", port=port, debug=True, threaded=True)
+    else:
+        try:
+            from waitress import serve
+        except ImportError:
+            print("waitress not installed; falling back to the threaded Flask server")
+            app.run(host="0.0.0.0", port=port, debug=False, threaded=True)
+        else:
+            serve(app, host="0.0.0.0", port=port, threads=int(os.environ.get("WAITRESS_THREADS", 16)))
@@ -5,7 +5,7 @@ LLM-backed reasoning helpers for intent and chat, using local Ollama.
 """
 
 from __future__ import annotations
-from typing import Tuple, Dict
+from typing import Tuple, Dict, List, Sequence
 from .agent_schemas import AgentState
 from .llm_clients.ollama_client import call_json
 
@@ -23,44 +23,114 @@ INTENT_SCHEMA = {
 }
 
 
-def llm_decide_intent(model: str, state: AgentState, snapshot: Dict, context: Dict) -> Tuple[str, str, str]:
-    """Select next high-level destination category with human-like rationale."""
-    mem_lines = "\n".join(f"- {m.text}" for m in state.recent(6))
+# Several agents per request: one entry per agent id in "decisions"
+BATCH_INTENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "decisions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"id": {"type": "string"}, **INTENT_SCHEMA["properties"]},
+                "required": ["id", "category"]
+            }
+        }
+    },
+    "required": ["decisions"]
+}
+
+
+_INTENT_HEADER = (
+    "Decide a destination category from: grocery, pharmacy, cafe, restaurant, education, health, retail, transit, leisure.\n"
+)
+_INTENT_CONSTRAINTS = (
+    "Constraints:\n"
+    "- Pick ONE category only, consistent with needs and role/time.\n"
+    "- thought: <= 20 words, first-person, natural (e.g., 'I need a quick coffee before class.').\n"
+    "- memory: <= 18 words, a concise first-person summary of the choice (e.g., 'Chose a cafe near campus to wake up.')."
+)
+
+
+_INTENT_SYSTEM = (
+    "You are an on-device simulation agent deciding a realistic next stop. "
+    "Always return STRICT JSON only (no prose) matching the provided schema. "
+    "Use persona, recent memories, and top needs. Keep thought first-person, short, and specific."
+)
+_BATCH_INTENT_SYSTEM = (
+    "You decide realistic next stops for several on-device simulation agents, each independently. "
+    "Always return STRICT JSON only (no prose) matching the provided schema. "
+    "Use each agent's persona, recent memories, and top needs. Keep thoughts first-person, short, and specific."
+)
+
+
+def _mem_lines(state: AgentState, k: int) -> str:
+    return "\n".join(["- " + m.text for m in state.recent(k)])
+
+
+def _agent_block(state: AgentState, snapshot: Dict, context: Dict) -> str:
+    mem_lines = _mem_lines(state, 6)
     top_needs = sorted((snapshot.get("needs") or {}).items(), key=lambda x: -x[1])
     needs_str = ", ".join(f"{k}:{v:.2f}" for k, v in top_needs[:3])
     tod = context.get("time_of_day") or snapshot.get("time_of_day") or "unknown"
     role = snapshot.get("role") or state.persona.role
-
-    scenario_id = context.get("scenario_id")
-    biases = context.get("biases", {})
-
-    system = (
-        "You are an on-device simulation agent deciding a realistic next stop. "
-        "Always return STRICT JSON only (no prose) matching the provided schema. "
-        "Use persona, recent memories, and top needs. Keep thought first-person, short, and specific."
-    )
-
-    prompt = (
-        "Decide a destination category from: grocery, pharmacy, cafe, restaurant, education, health, retail, transit, leisure.\n"
+    return (
         f"Persona: {state.persona.compact()}\n"
         f"Role: {role}\n"
         f"Time of day: {tod}\n"
         f"Top needs (high→low): {needs_str or '—'}\n"
         f"Recent memories (latest first):\n{mem_lines or '- none -'}\n"
-        + (f"Scenario: {scenario_id}. Suggested emphasis by category: {biases}.\n" if scenario_id or biases else "")
-        + "Constraints:\n"
-        "- Pick ONE category only, consistent with needs and role/time.\n"
-        "- thought: <= 20 words, first-person, natural (e.g., 'I need a quick coffee before class.').\n"
-        "- memory: <= 18 words, a concise first-person summary of the choice (e.g., 'Chose a cafe near campus to wake up.')."
     )
 
-    out = call_json(model, system, prompt, INTENT_SCHEMA, temperature=0.4)
+
+def _scenario_line(context: Dict) -> str:
+    scenario_id = context.get("scenario_id")
+    biases = context.get("biases", {})
+    if scenario_id or biases:
+        return f"Scenario: {scenario_id}. Suggested emphasis by category: {biases}.\n"
+    return ""
+
+
+def llm_decide_intent(model: str, state: AgentState, snapshot: Dict, context: Dict) -> Tuple[str, str, str]:
+    """Select next high-level destination category with human-like rationale."""
+    prompt = "".join([_INTENT_HEADER, _agent_block(state, snapshot, context), _scenario_line(context), _INTENT_CONSTRAINTS])
+
+    out = call_json(model, _INTENT_SYSTEM, prompt, INTENT_SCHEMA, temperature=0.4)
     cat = out.get("category", "retail")
     thought = out.get("thought", "")
     memory = out.get("memory", f"Chose {cat}.")
     return cat, thought, memory
 
 
+def llm_decide_intents(model: str, items: Sequence[Tuple[AgentState, Dict]], context: Dict) -> Dict[str, Tuple[str, str, str]]:
+    """Decide for several agents with one prompt; the shared preamble is evaluated once.
+
+    items are (state, snapshot) pairs. Returns {agent_id: (category, thought, memory)} for the
+    agents the model answered; callers fall back to llm_decide_intent for any id missing.
+    """
+    parts: List[str] = [_INTENT_HEADER]
+    for state, snapshot in items:
+        parts.append(f"\nAgent id: {snapshot['id']}\n")
+        parts.append(_agent_block(state, snapshot, context))
+    parts.append("\n")
+    parts.append(_scenario_line(context))
+    parts.append(_INTENT_CONSTRAINTS)
+    parts.append("\n- Return one entry per agent id in 'decisions', using the ids exactly as given.")
+    prompt = "".join(parts)
+
+    out = call_json(model, _BATCH_INTENT_SYSTEM, prompt, BATCH_INTENT_SCHEMA, temperature=0.4)
+    wanted = {snapshot["id"] for _, snapshot in items}
+    results: Dict[str, Tuple[str, str, str]] = {}
+    entries = out.get("decisions") if isinstance(out, dict) else None
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        agent_id, cat = entry.get("id"), entry.get("category")
+        if agent_id not in wanted or agent_id in results or not isinstance(cat, str):
+            continue
+        results[agent_id] = (cat, entry.get("thought", ""), entry.get("memory", f"Chose {cat}."))
+    return results
+
+
 CHAT_SCHEMA = {
     "type": "object",
     "properties": {
@@ -73,10 +143,20 @@ CHAT_SCHEMA = {
 }
 
 
+_CHAT_GUIDELINES = (
+    "Guidelines:\n"
+    "- Exactly one line for A and one for B.\n"
+    "- <= 16 words per line.\n"
+    "- If plausible, touch on a shared interest or current need; otherwise note surroundings.\n"
+    "- No stage directions, no quotes, no emojis.\n"
+    "- mem_a/mem_b: first-person takeaways (<= 14 words)."
+)
+
+
 def llm_chat(model: str, a_state: AgentState, b_state: AgentState, context: Dict) -> Dict:
     """Generate a brief, varied two-line exchange tailored to each persona and context."""
-    a_mem = "\n".join(f"- {m.text}" for m in a_state.recent(4))
-    b_mem = "\n".join(f"- {m.text}" for m in b_state.recent(4))
+    a_mem = _mem_lines(a_state, 4)
+    b_mem = _mem_lines(b_state, 4)
     topic = context.get("topic", "a nearby spot")
     time_of_day = context.get("time_of_day", "")
 
@@ -85,19 +165,15 @@ def llm_chat(model: str, a_state: AgentState, b_state: AgentState, context: Dict
         "Return STRICT JSON only. Avoid generic greetings; vary diction using traits/prefs."
     )
 
-    prompt = (
+    when = f" around {time_of_day}" if time_of_day else ""
+    prompt = "".join([
         f"A persona: {a_state.persona.compact()}\n"
         f"A recent memories:\n{a_mem or '- none -'}\n\n"
         f"B persona: {b_state.persona.compact()}\n"
         f"B recent memories:\n{b_mem or '- none -'}\n\n"
-        f"Context: They bump into each other at {topic}{' around ' + time_of_day if time_of_day else ''}.\n"
-        "Guidelines:\n"
-        "- Exactly one line for A and one for B.\n"
-        "- <= 16 words per line.\n"
-        "- If plausible, touch on a shared interest or current need; otherwise note surroundings.\n"
-        "- No stage directions, no quotes, no emojis.\n"
-        "- mem_a/mem_b: first-person takeaways (<= 14 words)."
-    )
+        f"Context: They bump into each other at {topic}{when}.\n",
+        _CHAT_GUIDELINES,
+    ])
 
     out = call_json(model, system, prompt, CHAT_SCHEMA, temperature=0.5)
     return {
@@ -2,41 +2,69 @@
 # -*- coding: utf-8 -*-
 """
 Typed schemas shared across the brain server modules.
+
+Internal agent state (persona, memories) uses plain slotted dataclasses: it is
+built and serialized on every decision from trusted local data, so pydantic
+validation is pure overhead there. Request/response models stay pydantic.
 """
 
 from __future__ import annotations
-from pydantic import BaseModel, Field
-from typing import Dict, List, Optional
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import islice
+from pydantic import BaseModel
+from typing import Deque, Dict, List, Optional
+
+# In-memory memories per agent; the full history lives in mem.jsonl and prompts
+# only ever read the last few.
+MAX_MEMORIES = 256
 
 
-class AgentPersona(BaseModel):
+@dataclass(slots=True)
+class AgentPersona:
     id: str
     role: str
     name: str
-    traits: List[str] = Field(default_factory=list)
-    prefs: Dict[str, str] = Field(default_factory=dict)
+    traits: List[str] = field(default_factory=list)
+    prefs: Dict[str, str] = field(default_factory=dict)
+    # compact() result; personas aren't mutated after creation. Reset to None if they ever are.
+    _compact: Optional[str] = field(default=None, init=False, repr=False, compare=False)
 
     def compact(self) -> str:
-        t = ", ".join(self.traits[:5]) if self.traits else "—"
-        p = ", ".join(f"{k}:{v}" for k, v in list(self.prefs.items())[:6]) if self.prefs else "—"
-        return f"{self.name} ({self.role}); traits: {t}; prefs: {p}"
+        if self._compact is None:
+            t = ", ".join(self.traits[:5]) if self.traits else "—"
+            p = ", ".join(f"{k}:{v}" for k, v in list(self.prefs.items())[:6]) if self.prefs else "—"
+            self._compact = f"{self.name} ({self.role}); traits: {t}; prefs: {p}"
+        return self._compact
 
+    def to_dict(self) -> Dict:
+        return {"id": self.id, "role": self.role, "name": self.name, "traits": list(self.traits), "prefs": dict(self.prefs)}
 
-class MemoryEvent(BaseModel):
+
+@dataclass(slots=True)
+class MemoryEvent:
     ts: str
     kind: str  # decision|chat|meeting|observation|trip
     text: str
-    tags: List[str] = Field(default_factory=list)
+    tags: List[str] = field(default_factory=list)
 
 
-class AgentState(BaseModel):
+@dataclass(slots=True)
+class AgentState:
     id: str
     persona: AgentPersona
     last_intent: Optional[str] = None
-    memories: List[MemoryEvent] = Field(default_factory=list)
+    memories: Deque[MemoryEvent] = field(default_factory=lambda: deque(maxlen=MAX_MEMORIES))
+
+    def __post_init__(self):
+        if not isinstance(self.memories, deque) or self.memories.maxlen != MAX_MEMORIES:
+            self.memories = deque(self.memories, maxlen=MAX_MEMORIES)
 
     def recent(self, k: int = 6) -> List[MemoryEvent]:
-        return self.memories[-k:]
+        # Walk in from the right end: O(k) regardless of how many are held
+        out = list(islice(reversed(self.memories), k))
+        out.reverse()
+        return out
 
 
 class AgentSnapshot(BaseModel):
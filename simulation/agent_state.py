@@ -5,13 +5,32 @@ Per-agent state and memory persistence.
 """
 
 from __future__ import annotations
-import os, json, time, random
-from typing import Dict, Optional, List
+import os, json, time, atexit, threading, hashlib
+from dataclasses import asdict
+from typing import BinaryIO, Dict, Optional, List, Tuple
 from .agent_schemas import AgentState, AgentPersona, MemoryEvent
 
+try:
+    import orjson
+    HAVE_ORJSON = True
+except ImportError:
+    HAVE_ORJSON = False
+
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "out", "brain_runs"))
 _CACHE: Dict[str, Dict[str, AgentState]] = {}
+_INIT_LOCK = threading.Lock()
+
+# Append handles for mem.jsonl, kept open per (run_id, agent_id). Writes are
+# buffered and flushed every FLUSH_EVERY lines / FLUSH_INTERVAL_S seconds,
+# before a mem.jsonl is read back, and at exit.
+_FH_CACHE: Dict[Tuple[str, str], BinaryIO] = {}
+_FH_LOCK = threading.Lock()
+MAX_OPEN_HANDLES = 256
+FLUSH_EVERY = 64
+FLUSH_INTERVAL_S = 1.0
+_pending = 0
+_last_flush = time.monotonic()
 
 
 def _run_dir(run_id: str) -> str:
@@ -26,35 +45,142 @@ def _mem_path(run_id: str, agent_id: str) -> str:
     return os.path.join(_agent_dir(run_id, agent_id), "mem.jsonl")
 
 
-def _now_iso() -> str:
-    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+_ISO_CACHE: Tuple[int, str] = (-1, "")  # (epoch second, formatted)
 
 
-def _ensure_cache(run_id: str):
-    if run_id not in _CACHE:
-        _CACHE[run_id] = {}
+def _now_iso() -> str:
+    """UTC timestamp at second granularity; formatted once per second."""
+    global _ISO_CACHE
+    now = int(time.time())
+    cached = _ISO_CACHE
+    if cached[0] != now:
+        cached = _ISO_CACHE = (now, time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now)))
+    return cached[1]
+
+
+def _dump_line(obj) -> bytes:
+    if HAVE_ORJSON:
+        return orjson.dumps(obj) + b"\n"
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _parse_line(line: bytes) -> Optional[dict]:
+    """Parse one mem.jsonl line; None for a torn or malformed line."""
+    try:
+        return orjson.loads(line) if HAVE_ORJSON else json.loads(line)
+    except ValueError:
+        return None
+
+
+def _handle(run_id: str, agent_id: str) -> BinaryIO:
+    """Open (once) the agent's mem.jsonl for appending. Caller holds _FH_LOCK."""
+    key = (run_id, agent_id)
+    fh = _FH_CACHE.get(key)
+    if fh is None:
+        if len(_FH_CACHE) >= MAX_OPEN_HANDLES:
+            # Stay under the fd limit: close the oldest handle
+            _FH_CACHE.pop(next(iter(_FH_CACHE))).close()
+        os.makedirs(_agent_dir(run_id, agent_id), exist_ok=True)
+        fh = open(_mem_path(run_id, agent_id), "ab")
+        _FH_CACHE[key] = fh
+    return fh
+
+
+def _flush_locked():
+    global _pending, _last_flush
+    for fh in _FH_CACHE.values():
+        fh.flush()
+    _pending = 0
+    _last_flush = time.monotonic()
+
+
+def _write_line(run_id: str, agent_id: str, obj: dict):
+    global _pending
+    line = _dump_line(obj)
+    with _FH_LOCK:
+        _handle(run_id, agent_id).write(line)
+        _pending += 1
+        if _pending >= FLUSH_EVERY or time.monotonic() - _last_flush >= FLUSH_INTERVAL_S:
+            _flush_locked()
+
+
+def flush_all():
+    """Flush buffered memory writes for every agent."""
+    with _FH_LOCK:
+        _flush_locked()
+
+
+@atexit.register
+def close_all():
+    with _FH_LOCK:
+        for fh in _FH_CACHE.values():
+            fh.close()
+        _FH_CACHE.clear()
+
+
+def _ensure_cache(run_id: str) -> Dict[str, AgentState]:
+    return _CACHE.setdefault(run_id, {})
+
+
+_FIRST = ("Alex","Sam","Taylor","Jordan","Riley","Casey","Jamie","Avery","Morgan","Drew")  # neutral
+_LAST = ("Lee","Patel","Nguyen","Kim","Singh","Brown","Garcia","Martin","Hernandez","Wilson")
+_CORE_TRAITS = (
+    "punctual","social","frugal","curious","optimistic","introvert","extrovert","planner","impulsive","health-conscious",
+    "night-owl","early-riser","tech-savvy","bookish","foodie","gym-goer"
+)
+_N_TRAITS = 4
+_COFFEE = ("low","med","high")
+_BUDGET = ("low","med","high")
+_DIET = ("omnivorous","vegetarian","vegan","halal","kosher","pescatarian")
+_MOBILITY = ("walk","bus","bike")
+_STUDY_STUDENT = ("quiet","lively","outdoors")
+_STUDY_OTHER = ("quiet","lively")
+_FAV = ("cafe","park","grocery","library","gym","restaurant")
+# Every choice below consumes one mixed-radix digit of a single 96-bit value;
+# the product of all radixes is ~1e10, so the modulo bias is negligible.
+_ENTROPY_BYTES = 12
+
+
+def _persona_entropy(agent_id: str, seed: Optional[int]) -> int:
+    """
+    96 bits derived from the seed (or agent id) with BLAKE2b. Unlike hash(str),
+    this is stable across processes regardless of PYTHONHASHSEED, and there is
+    no Mersenne Twister state to initialise per agent.
+    """
+    key = f"seed:{seed}" if seed else agent_id
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=_ENTROPY_BYTES).digest(), "little")
 
 
 def create_persona(agent_id: str, role: str, seed: Optional[int] = None, prefs: Optional[Dict[str, str]] = None) -> AgentPersona:
     """Sample a slightly richer persona with consistent quirks/preferences per agent."""
-    rnd = random.Random(seed or (hash(agent_id) & 0xffffffff))
-    first = rnd.choice(["Alex","Sam","Taylor","Jordan","Riley","Casey","Jamie","Avery","Morgan","Drew"])  # neutral
-    last = rnd.choice(["Lee","Patel","Nguyen","Kim","Singh","Brown","Garcia","Martin","Hernandez","Wilson"])
+    x = _persona_entropy(agent_id, seed)
+
+    x, i = divmod(x, len(_FIRST)); first = _FIRST[i]
+    x, i = divmod(x, len(_LAST)); last = _LAST[i]
 
-    core_traits = [
-        "punctual","social","frugal","curious","optimistic","introvert","extrovert","planner","impulsive","health-conscious",
-        "night-owl","early-riser","tech-savvy","bookish","foodie","gym-goer"
-    ]
-    traits = rnd.sample(core_traits, k=4)
+    # Floyd's sampling of _N_TRAITS distinct traits (no population copy)
+    n = len(_CORE_TRAITS)
+    picked: List[int] = []
+    for j in range(n - _N_TRAITS, n):
+        x, t = divmod(x, j + 1)
+        picked.append(j if t in picked else t)
+    traits = [_CORE_TRAITS[k] for k in picked]
 
     # Preferences influence needs/intents subtly
+    study = _STUDY_STUDENT if role in ("student","education") else _STUDY_OTHER
+    x, i_coffee = divmod(x, len(_COFFEE))
+    x, i_budget = divmod(x, len(_BUDGET))
+    x, i_diet = divmod(x, len(_DIET))
+    x, i_mob = divmod(x, len(_MOBILITY))
+    x, i_study = divmod(x, len(study))
+    x, i_fav = divmod(x, len(_FAV))
     base_prefs = {
-        "coffee": rnd.choice(["low","med","high"]),
-        "budget": rnd.choice(["low","med","high"]),
-        "diet": rnd.choice(["omnivorous","vegetarian","vegan","halal","kosher","pescatarian"]),
-        "mobility": rnd.choice(["walk","bus","bike"]),
-        "study_spot": rnd.choice(["quiet","lively","outdoors"]) if role in ("student","education") else rnd.choice(["quiet","lively"]) ,
-        "favorite": rnd.choice(["cafe","park","grocery","library","gym","restaurant"]) ,
+        "coffee": _COFFEE[i_coffee],
+        "budget": _BUDGET[i_budget],
+        "diet": _DIET[i_diet],
+        "mobility": _MOBILITY[i_mob],
+        "study_spot": study[i_study],
+        "favorite": _FAV[i_fav],
     }
     if prefs:
         base_prefs.update(prefs)
@@ -63,56 +189,60 @@ def create_persona(agent_id: str, role: str, seed: Optional[int] = None, prefs:
 
 
 def init_agent(run_id: str, agent_id: str, role: str, seed: Optional[int] = None, prefs: Optional[Dict[str, str]] = None) -> AgentState:
-    _ensure_cache(run_id)
-    if agent_id in _CACHE[run_id]:
-        return _CACHE[run_id][agent_id]
-    persona = create_persona(agent_id, role, seed, prefs)
-    state = AgentState(id=agent_id, persona=persona, last_intent=None, memories=[])
-    # ensure dirs
-    os.makedirs(_agent_dir(run_id, agent_id), exist_ok=True)
-    _CACHE[run_id][agent_id] = state
-    return state
+    run_cache = _ensure_cache(run_id)
+    st = run_cache.get(agent_id)
+    if st is not None:
+        return st
+    # Concurrent requests for the same agent must not create two personas
+    with _INIT_LOCK:
+        st = run_cache.get(agent_id)
+        if st is None:
+            persona = create_persona(agent_id, role, seed, prefs)
+            st = AgentState(id=agent_id, persona=persona, last_intent=None, memories=[])
+            # ensure dirs
+            os.makedirs(_agent_dir(run_id, agent_id), exist_ok=True)
+            run_cache[agent_id] = st
+    return st
 
 
 def get_state(run_id: str, agent_id: str) -> Optional[AgentState]:
-    _ensure_cache(run_id)
-    st = _CACHE[run_id].get(agent_id)
+    run_cache = _ensure_cache(run_id)
+    st = run_cache.get(agent_id)
     if st is None:
         # Try to lazily load last persona if exists
         mem_path = _mem_path(run_id, agent_id)
         if os.path.exists(mem_path):
+            flush_all()
             # Load persona if present in first line with kind=="persona"
             persona = None
             memories: List[MemoryEvent] = []
-            with open(mem_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    try:
-                        obj = json.loads(line)
-                        if obj.get("kind") == "persona" and not persona:
-                            persona = AgentPersona(**obj["persona"])  # type: ignore
-                        else:
-                            memories.append(MemoryEvent(**obj))
-                    except Exception:
-                        continue
+            with open(mem_path, "rb") as f:
+                raw = f.read()
+            for obj in (_parse_line(line) for line in raw.split(b"\n") if line):
+                if obj is None:
+                    continue
+                try:
+                    if obj.get("kind") == "persona" and not persona:
+                        persona = AgentPersona(**obj["persona"])  # type: ignore
+                    else:
+                        memories.append(MemoryEvent(**obj))
+                except Exception:
+                    continue
             if persona:
                 st = AgentState(id=agent_id, persona=persona, memories=memories)
-                _CACHE[run_id][agent_id] = st
+                st = run_cache.setdefault(agent_id, st)
     return st
 
 
 def append_memory(run_id: str, agent_id: str, ev: MemoryEvent):
-    os.makedirs(_agent_dir(run_id, agent_id), exist_ok=True)
-    with open(_mem_path(run_id, agent_id), "a", encoding="utf-8") as f:
-        f.write(json.dumps(ev.model_dump(), ensure_ascii=False) + "\n")
+    _write_line(run_id, agent_id, asdict(ev))
     st = get_state(run_id, agent_id)
     if st:
         st.memories.append(ev)
 
 
 def persist_persona(run_id: str, agent_id: str, persona: AgentPersona):
-    os.makedirs(_agent_dir(run_id, agent_id), exist_ok=True)
-    rec = {"ts": _now_iso(), "kind": "persona", "persona": persona.model_dump()}
-    with open(_mem_path(run_id, agent_id), "a", encoding="utf-8") as f:
-        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    rec = {"ts": _now_iso(), "kind": "persona", "persona": persona.to_dict()}
+    _write_line(run_id, agent_id, rec)
 
 
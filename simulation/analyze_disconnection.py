@@ -7,6 +7,19 @@ import numpy as np
 import json
 from PIL import Image, ImageDraw
 import os
+from collections import deque
+
+try:
+    from scipy import ndimage
+    HAVE_SCIPY = True
+except ImportError:
+    HAVE_SCIPY = False
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
 
 # Semantic classes (match Step 2)
 VOID, BUILDING, SIDEWALK, FOOTPATH, PARKING, PLAZA, GREEN, WATER, ROAD, CROSSING = range(10)
@@ -15,38 +28,132 @@ CLASS_NAMES = {
     PARKING:"parking", PLAZA:"plaza", GREEN:"green", WATER:"water", ROAD:"road", CROSSING:"crossing"
 }
 
-def find_connected_components(walkable):
-    """Find all connected components in the walkable grid"""
+# 8-connectivity, matching the navigation grid's diagonal moves
+EIGHT_CONNECTED = np.ones((3, 3), dtype=np.int8)
+
+def _label_bfs(walkable):
+    """Pure-Python fallback labeling; returns (labels, n) like ndimage.label."""
     H, W = walkable.shape
-    visited = np.zeros_like(walkable, dtype=bool)
-    components = []
+    labels = np.zeros((H, W), dtype=np.int32)
+    n = 0
     
     directions = [(-1,-1),(-1,0),(-1,1),(0,-1),(0,1),(1,-1),(1,0),(1,1)]
     
     for y in range(H):
         for x in range(W):
-            if walkable[y, x] == 1 and not visited[y, x]:
+            if walkable[y, x] == 1 and labels[y, x] == 0:
                 # Start new component
-                component = []
-                queue = [(y, x)]
-                visited[y, x] = True
+                n += 1
+                queue = deque([(y, x)])
+                labels[y, x] = n
                 
                 while queue:
-                    cy, cx = queue.pop(0)
-                    component.append((cy, cx))
+                    cy, cx = queue.popleft()  # O(1); list.pop(0) made large components quadratic
                     
                     for dy, dx in directions:
                         ny, nx = cy + dy, cx + dx
                         if (0 <= ny < H and 0 <= nx < W and 
-                            not visited[ny, nx] and walkable[ny, nx] == 1):
-                            visited[ny, nx] = True
+                            labels[ny, nx] == 0 and walkable[ny, nx] == 1):
+                            labels[ny, nx] = n
                             queue.append((ny, nx))
-                
-                components.append(component)
     
-    # Sort by size (largest first)
-    components.sort(key=len, reverse=True)
-    return components
+    return labels, n
+
+if HAVE_NUMBA:
+    @njit(cache=True)
+    def _find(parent, i):
+        # Path halving: every visited node skips to its grandparent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    @njit(cache=True)
+    def _union(parent, a, b):
+        ra = _find(parent, a)
+        rb = _find(parent, b)
+        # Link to the smaller index so roots stay the first-seen pixel
+        if ra < rb:
+            parent[rb] = ra
+        elif rb < ra:
+            parent[ra] = rb
+
+    @njit(cache=True)
+    def _label_numba(walkable):
+        """
+        Compiled two-pass union-find labeling (one-pass scan + root remap).
+        Pass 1 walks rows in memory order and unions each walkable cell with
+        its already-visited W, NW, N, NE neighbours; pass 2 maps every root to
+        a compact id in raster order. Returns (labels, n) like ndimage.label.
+        """
+        H, W = walkable.shape
+        parent = np.empty(H * W, dtype=np.int32)
+        for y in range(H):
+            for x in range(W):
+                if walkable[y, x] != 1:
+                    continue
+                p = y * W + x
+                parent[p] = p
+                if x > 0 and walkable[y, x - 1] == 1:
+                    _union(parent, p, p - 1)
+                if y > 0:
+                    if x > 0 and walkable[y - 1, x - 1] == 1:
+                        _union(parent, p, p - W - 1)
+                    if walkable[y - 1, x] == 1:
+                        _union(parent, p, p - W)
+                    if x < W - 1 and walkable[y - 1, x + 1] == 1:
+                        _union(parent, p, p - W + 1)
+
+        labels = np.zeros((H, W), dtype=np.int32)
+        remap = np.zeros(H * W, dtype=np.int32)
+        n = 0
+        for y in range(H):
+            for x in range(W):
+                if walkable[y, x] != 1:
+                    continue
+                r = _find(parent, y * W + x)
+                if remap[r] == 0:
+                    n += 1
+                    remap[r] = n
+                labels[y, x] = remap[r]
+        return labels, n
+
+def label_components(walkable):
+    """
+    Label the 8-connected components of the walkable grid.
+    Returns (labels, sizes): labels[y, x] is the size rank of the component
+    containing (y, x) (1 = largest, 0 = not walkable) and sizes[k-1] is the
+    cell count of component k.
+    """
+    if HAVE_SCIPY:
+        raw, n = ndimage.label(walkable == 1, structure=EIGHT_CONNECTED)
+    elif HAVE_NUMBA:
+        raw, n = _label_numba(np.ascontiguousarray(walkable))
+    else:
+        raw, n = _label_bfs(walkable)
+    
+    # Re-number labels by size rank (largest first)
+    sizes = np.bincount(raw.ravel(), minlength=n + 1)[1:]
+    order = np.argsort(-sizes, kind="stable")
+    rank_of_label = np.zeros(n + 1, dtype=np.int32)
+    rank_of_label[order + 1] = np.arange(1, n + 1, dtype=np.int32)
+    return rank_of_label[raw], sizes[order]
+
+def components_from_labels(labels, sizes):
+    """(y, x) lists per component, largest first, from label_components() output"""
+    if len(sizes) == 0:
+        return []
+    # Group cell coordinates by label with one stable sort instead of a mask per component
+    flat = labels.ravel()
+    idx = np.flatnonzero(flat)
+    idx = idx[np.argsort(flat[idx], kind="stable")]
+    ys, xs = np.unravel_index(idx, labels.shape)
+    bounds = np.cumsum(sizes)[:-1]
+    return [list(zip(cy.tolist(), cx.tolist())) for cy, cx in zip(np.split(ys, bounds), np.split(xs, bounds))]
+
+def find_connected_components(walkable):
+    """Find all connected components in the walkable grid, as (y, x) lists sorted by size"""
+    return components_from_labels(*label_components(walkable))
 
 def analyze_barrier_between_points(semantic, walkable, start, goal, sample_points=20):
     """Analyze what's blocking the path between start and goal"""
@@ -55,52 +162,42 @@ def analyze_barrier_between_points(semantic, walkable, start, goal, sample_point
     
     print(f"\nAnalyzing barriers between {start} and {goal}")
     
-    # Sample points along the line between start and goal
-    for i in range(sample_points + 1):
-        t = i / sample_points
-        y = int(sy + t * (gy - sy))
-        x = int(sx + t * (gx - sx))
-        
-        if 0 <= y < semantic.shape[0] and 0 <= x < semantic.shape[1]:
-            sem_class = semantic[y, x]
-            is_walkable = walkable[y, x]
-            class_name = CLASS_NAMES.get(sem_class, f"unknown_{sem_class}")
-            
-            print(f"Point {i:2d}: ({y:3d}, {x:3d}) - {class_name:12s} - walkable: {is_walkable}")
-
-def create_component_visualization(walkable, components, start, goal, output_path):
-    """Create visualization showing different connected components"""
-    H, W = walkable.shape
+    # Sample points along the line between start and goal (truncated toward
+    # zero like int()), then gather classes/walkability in one indexing pass
+    ts = np.arange(sample_points + 1) / sample_points
+    ys = np.trunc(sy + ts * (gy - sy)).astype(np.int64)
+    xs = np.trunc(sx + ts * (gx - sx)).astype(np.int64)
+    inside = (ys >= 0) & (ys < semantic.shape[0]) & (xs >= 0) & (xs < semantic.shape[1])
+    idx = np.flatnonzero(inside)
+    sem = semantic[ys[idx], xs[idx]]
+    walk = walkable[ys[idx], xs[idx]]
     
-    # Create RGB image
-    rgb = np.zeros((H, W, 3), dtype=np.uint8)
-    
-    # Gray for non-walkable
-    rgb[walkable == 0] = (64, 64, 64)
-    
-    # Different colors for different components
-    colors = [
-        (255, 0, 0),    # Red for largest
-        (0, 255, 0),    # Green for second largest
-        (0, 0, 255),    # Blue for third largest
-        (255, 255, 0),  # Yellow
-        (255, 0, 255),  # Magenta
-        (0, 255, 255),  # Cyan
-        (255, 128, 0),  # Orange
-        (128, 255, 0),  # Lime
-        (128, 0, 255),  # Purple
-        (255, 128, 128), # Light red
-    ]
-    
-    for i, component in enumerate(components[:len(colors)]):
-        color = colors[i]
-        for y, x in component:
-            rgb[y, x] = color
-    
-    # White for remaining small components
-    for i, component in enumerate(components[len(colors):]):
-        for y, x in component:
-            rgb[y, x] = (255, 255, 255)
+    for i, y, x, sem_class, is_walkable in zip(idx.tolist(), ys[idx].tolist(), xs[idx].tolist(),
+                                               sem.tolist(), walk.tolist()):
+        class_name = CLASS_NAMES.get(sem_class, f"unknown_{sem_class}")
+        print(f"Point {i:2d}: ({y:3d}, {x:3d}) - {class_name:12s} - walkable: {is_walkable}")
+
+# Palette indexed by clipped size rank: 0 = not walkable, 1..10 = ten largest
+# components, last entry = every smaller component
+COMPONENT_PALETTE = np.array([
+    (64, 64, 64),     # Gray for non-walkable
+    (255, 0, 0),      # Red for largest
+    (0, 255, 0),      # Green for second largest
+    (0, 0, 255),      # Blue for third largest
+    (255, 255, 0),    # Yellow
+    (255, 0, 255),    # Magenta
+    (0, 255, 255),    # Cyan
+    (255, 128, 0),    # Orange
+    (128, 255, 0),    # Lime
+    (128, 0, 255),    # Purple
+    (255, 128, 128),  # Light red
+    (255, 255, 255),  # White for remaining small components
+], dtype=np.uint8)
+
+def create_component_visualization(walkable, labels, start, goal, output_path):
+    """Create visualization showing different connected components (labels from label_components)"""
+    # One palette gather builds the whole H x W x 3 image
+    rgb = COMPONENT_PALETTE[np.minimum(labels, len(COMPONENT_PALETTE) - 1)]
     
     img = Image.fromarray(rgb)
     draw = ImageDraw.Draw(img)
@@ -123,8 +220,8 @@ def create_component_visualization(walkable, components, start, goal, output_pat
 if __name__ == "__main__":
     out_dir = "out/society145_1km"
     
-    # Load data
-    semantic = np.load(os.path.join(out_dir, "semantic.npy"))
+    # Load data; semantic is memory-mapped so the barrier sampling only faults in the pages it touches
+    semantic = np.load(os.path.join(out_dir, "semantic.npy"), mmap_mode='r')
     nav_data = np.load(os.path.join(out_dir, "navgraph.npz"))
     walkable = nav_data['walkable']
     
@@ -133,20 +230,21 @@ if __name__ == "__main__":
     goal = (130, 129)
     
     print("=== CONNECTED COMPONENTS ANALYSIS ===")
-    components = find_connected_components(walkable)
+    labels, sizes = label_components(walkable)
     
-    print(f"Found {len(components)} connected components")
+    print(f"Found {len(sizes)} connected components")
     print("Top 10 components by size:")
-    for i, comp in enumerate(components[:10]):
-        print(f"  Component {i+1}: {len(comp)} cells")
+    for i, size in enumerate(sizes[:10].tolist()):
+        print(f"  Component {i+1}: {size} cells")
     
-    # Find which components contain start and goal
-    start_comp = goal_comp = None
-    for i, comp in enumerate(components):
-        if start in comp:
-            start_comp = i
-        if goal in comp:
-            goal_comp = i
+    # Labels are size ranks (1 = largest, 0 = not walkable), so the component
+    # index of a point is a direct lookup rather than a scan of every component
+    start_comp = int(labels[start]) - 1
+    goal_comp = int(labels[goal]) - 1
+    if start_comp < 0:
+        start_comp = None
+    if goal_comp < 0:
+        goal_comp = None
     
     print(f"\nStart {start} is in component: {start_comp + 1 if start_comp is not None else 'None'}")
     print(f"Goal {goal} is in component: {goal_comp + 1 if goal_comp is not None else 'None'}")
@@ -156,22 +254,25 @@ if __name__ == "__main__":
             print("Start and goal are in the SAME component - this shouldn't happen!")
         else:
             print(f"Start and goal are in DIFFERENT components ({start_comp+1} vs {goal_comp+1})")
-            print(f"Start component size: {len(components[start_comp])}")
-            print(f"Goal component size: {len(components[goal_comp])}")
+            print(f"Start component size: {int(sizes[start_comp])}")
+            print(f"Goal component size: {int(sizes[goal_comp])}")
     
     # Analyze what's between start and goal
     analyze_barrier_between_points(semantic, walkable, start, goal)
     
     # Create visualization
-    create_component_visualization(walkable, components, start, goal,
+    create_component_visualization(walkable, labels, start, goal,
                                  os.path.join(out_dir, "components_debug.png"))
     
     # Additional analysis: what classes are walkable
     print(f"\n=== WALKABLE CLASSES ===")
+    # Two bincounts replace a full-grid mask and sum per class
+    sem_flat = semantic.ravel()
+    total = np.bincount(sem_flat, minlength=10)
+    walk_cnt = np.bincount(sem_flat[walkable.ravel().astype(bool)], minlength=10)
     for class_id in range(10):
-        class_mask = (semantic == class_id)
-        walkable_in_class = np.sum(walkable[class_mask])
-        total_in_class = np.sum(class_mask)
+        walkable_in_class = int(walk_cnt[class_id])
+        total_in_class = int(total[class_id])
         if total_in_class > 0:
             pct = 100 * walkable_in_class / total_in_class
             print(f"{CLASS_NAMES[class_id]:12s}: {walkable_in_class:6d}/{total_in_class:6d} ({pct:5.1f}%) walkable")
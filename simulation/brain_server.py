@@ -16,23 +16,31 @@ Design:
 """
 
 from __future__ import annotations
-import os, json, time, uuid, random, logging
+import os, json, uuid, random, logging, asyncio, threading
+import anyio
 from typing import Dict, List, Any, Optional
 
 from fastapi import FastAPI, Body
-from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from .agent_schemas import AgentSnapshot as SnapModel, Decision as DecisionModel, NextIntent as NextIntentModel
 from .agent_schemas import AgentPersona, AgentState, MemoryEvent
-from .agent_state import init_agent, get_state, append_memory, persist_persona
-from .agent_brain import llm_decide_intent, llm_chat
+from .agent_state import init_agent, get_state, append_memory, persist_persona, _now_iso, _dump_line
+from .agent_brain import llm_decide_intent, llm_decide_intents, llm_chat
 from .llm_clients.ollama_client import warmup_model
 
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+    HAVE_ORJSON = True
+except ImportError:
+    HAVE_ORJSON = False
+
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
 
-app = FastAPI(title="Agent Brain Server", version="0.1")
+app = FastAPI(title="Agent Brain Server", version="0.1",
+              **({"default_response_class": ORJSONResponse} if HAVE_ORJSON else {}))
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -41,18 +49,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Set once the model has answered a warmup; at most one background warmup runs at a time
+WARMED = threading.Event()
+_WARMUP_LOCK = threading.Lock()
+_warmup_running = False
+
+
+def _start_background_warmup(timeout: int) -> None:
+    """Warm the model in a daemon thread unless it is already warm or warming."""
+    global _warmup_running
+    with _WARMUP_LOCK:
+        if WARMED.is_set() or _warmup_running:
+            return
+        _warmup_running = True
+
+    def background_warmup():
+        global _warmup_running
+        try:
+            if warmup_model("qwen2.5:3b-instruct", timeout=timeout):
+                WARMED.set()
+                logging.info("Background model warmup completed")
+        finally:
+            with _WARMUP_LOCK:
+                _warmup_running = False
+
+    threading.Thread(target=background_warmup, daemon=True).start()
+
+
 @app.on_event("startup")
 async def startup_event():
     """Warmup model on server startup for immediate demo readiness."""
     logging.info("Server starting - warming up model for demo...")
     # Run warmup in background to not block server startup
-    import threading
-    def background_warmup():
-        warmup_model("qwen2.5:3b-instruct", timeout=120)
-        logging.info("Background model warmup completed")
-    
-    thread = threading.Thread(target=background_warmup, daemon=True)
-    thread.start()
+    _start_background_warmup(timeout=120)
+    _start_metrics_writer()
 
 ROOT_OUT = os.path.abspath(os.path.join(os.path.dirname(__file__), "out"))
 RUNS: Dict[str, Dict[str, Any]] = {}
@@ -117,8 +147,18 @@ NEED_TO_CATEGORY = {
     "social": "cafe",
 }
 
-def _now_iso() -> str:
-    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+def _need_value(item):
+    return item[1]
+
+
+def _top_need_category(needs: Optional[Dict[str, Optional[float]]]) -> str:
+    """Category for the highest need (first wins on ties); retail when nothing qualifies."""
+    # max() runs the comparison loop in C; ties keep the first key like the old strict '>' scan
+    best = max((kv for kv in (needs or {}).items() if kv[1] is not None), key=_need_value, default=None)
+    if best is None or not best[1] > -1.0:
+        return NEED_TO_CATEGORY["leisure"]
+    return NEED_TO_CATEGORY.get(best[0], "retail")
+
 
 def _ensure_run_dirs(run_id: str) -> Dict[str, str]:
     run_dir = os.path.join(ROOT_OUT, "brain_runs", run_id)
@@ -131,6 +171,97 @@ def _ensure_run_dirs(run_id: str) -> Dict[str, str]:
     return files
 
 
+def _run_files(run_id: str, run: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+    """Paths for a run, cached on the RUNS entry so known runs skip makedirs."""
+    if run is not None and "files" in run:
+        return run["files"]
+    return _ensure_run_dirs(run_id)
+
+
+def _append(run: Optional[Dict[str, Any]], path: str, payload: bytes) -> None:
+    """Append payload to a run's jsonl file.
+
+    Known runs keep one O_APPEND descriptor per file until /end_run; each
+    os.write is a single atomic append, so threadpool handlers can share it.
+    Unknown or already-ended runs get a one-off open/append/close.
+    """
+    if run is None or run.get("closed"):
+        with open(path, "ab") as f:
+            f.write(payload)
+        return
+    fds = run.setdefault("fds", {})
+    fd = fds.get(path)
+    if fd is None:
+        new_fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        fd = fds.setdefault(path, new_fd)
+        if fd != new_fd:  # lost a race with another handler
+            os.close(new_fd)
+    os.write(fd, payload)
+
+
+def _close_fds(run: Optional[Dict[str, Any]]) -> None:
+    if run is None:
+        return
+    run["closed"] = True  # later appends for this run fall back to one-off writes
+    for fd in run.pop("fds", {}).values():
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+
+# /metrics only enqueues encoded samples; one background task does the disk writes
+METRICS_QUEUE_MAX = 1024    # pending /metrics payloads before handlers wait (backpressure)
+METRICS_FLUSH_S = 0.1       # coalescing window between background writes
+_METRICS_Q: Optional[asyncio.Queue] = None
+_METRICS_TASK: Optional[asyncio.Task] = None
+
+
+def _write_metric_batch(batch: List[tuple]) -> None:
+    # One write per run file for everything queued since the last flush
+    grouped: Dict[str, tuple] = {}
+    for run, path, payload in batch:
+        grouped.setdefault(path, (run, []))[1].append(payload)
+    for path, (run, parts) in grouped.items():
+        try:
+            _append(run, path, b"".join(parts))
+        except OSError as e:
+            logging.warning(f"Failed to append metrics to {path}: {e}")
+
+
+async def _metrics_writer(q: asyncio.Queue) -> None:
+    while True:
+        batch = [await q.get()]
+        while True:
+            try:
+                batch.append(q.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        try:
+            await anyio.to_thread.run_sync(_write_metric_batch, batch)
+        finally:
+            for _ in batch:
+                q.task_done()
+        await asyncio.sleep(METRICS_FLUSH_S)
+
+
+def _start_metrics_writer() -> None:
+    global _METRICS_Q, _METRICS_TASK
+    if _METRICS_TASK is None or _METRICS_TASK.done():
+        _METRICS_Q = asyncio.Queue(maxsize=METRICS_QUEUE_MAX)
+        _METRICS_TASK = asyncio.get_running_loop().create_task(_metrics_writer(_METRICS_Q))
+
+
+def _write_json(path: str, obj: Any) -> None:
+    """Write obj as indented JSON (orjson when installed)."""
+    if HAVE_ORJSON:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(obj, f, indent=2)
+
+
 # ---------------- Endpoints ----------------
 @app.post("/warmup")
 def warmup_endpoint():
@@ -139,6 +270,7 @@ def warmup_endpoint():
     logging.info(f"Warming up model: {model}")
     success = warmup_model(model, timeout=60)
     if success:
+        WARMED.set()
         logging.info("Model warmup completed successfully")
         return {"status": "warmed", "model": model}
     else:
@@ -148,11 +280,10 @@ def warmup_endpoint():
 
 @app.post("/start_run", response_model=StartRunResp)
 def start_run(req: StartRunReq = Body(...)):
-    # Auto-warmup on first run to ensure smooth demo experience
-    if not hasattr(start_run, '_warmed'):
-        logging.info("First run detected - warming up model...")
-        warmup_model("qwen2.5:3b-instruct", timeout=60)
-        start_run._warmed = True
+    # Never block the run on warmup: reuse the startup warmup, or retry it in the background if it failed
+    if not WARMED.is_set():
+        logging.info("Model not warm yet - run starts while warmup continues in the background")
+        _start_background_warmup(timeout=60)
     
     run_id = str(uuid.uuid4())
     random.seed(req.seed)
@@ -164,18 +295,17 @@ def start_run(req: StartRunReq = Body(...)):
         "samples": 0,
         "decisions": 0,
     }
-    files = _ensure_run_dirs(run_id)
+    files = RUNS[run_id]["files"] = _ensure_run_dirs(run_id)
     # Persist run metadata immediately for external watchers (live analytics)
     run_dir = os.path.dirname(files["metrics"]) if isinstance(files, dict) else os.path.join(ROOT_OUT, "brain_runs", run_id)
     try:
-        with open(os.path.join(run_dir, "run_meta.json"), "w", encoding="utf-8") as f:
-            json.dump({
-                "runId": run_id,
-                "hypothesisId": req.hypothesisId,
-                "seed": req.seed,
-                "speed": req.speed,
-                "started_at": RUNS[run_id]["started_at"],
-            }, f, indent=2)
+        _write_json(os.path.join(run_dir, "run_meta.json"), {
+            "runId": run_id,
+            "hypothesisId": req.hypothesisId,
+            "seed": req.seed,
+            "speed": req.speed,
+            "started_at": RUNS[run_id]["started_at"],
+        })
     except Exception as e:
         logging.warning(f"Failed to write run_meta.json for run {run_id}: {e}")
     logging.info("[run] start id=%s hyp=%s seed=%s", run_id, req.hypothesisId, req.seed)
@@ -203,60 +333,115 @@ def register_agents(req: RegisterReq = Body(...)):
     return OkResp(ok=True)
 
 
+# Max LLM calls in flight across all requests; the limiter is the only admission control for Ollama
+LLM_CONCURRENCY = max(1, int(os.getenv("LLM_CONCURRENCY", "4")))
+_LLM_LIMITER: Optional[anyio.CapacityLimiter] = None
+
+
+def _llm_limiter() -> anyio.CapacityLimiter:
+    # Created on first use so it binds to the running event loop
+    global _LLM_LIMITER
+    if _LLM_LIMITER is None:
+        _LLM_LIMITER = anyio.CapacityLimiter(LLM_CONCURRENCY)
+    return _LLM_LIMITER
+
+
+async def _run_llm(func, *args):
+    """Run a blocking LLM-bound call in a worker thread under the global limiter."""
+    return await anyio.to_thread.run_sync(func, *args, limiter=_llm_limiter())
+# Agents sharing one multi-agent prompt; 1 disables batching (one LLM call per agent)
+DECIDE_BATCH_SIZE = max(1, int(os.getenv("DECIDE_BATCH_SIZE", "8")))
+
+
+def _fallback_intent(ag: SnapModel, context: Dict[str, Any]):
+    """Bias-aware fallback when the LLM call fails: prefer categories present in context.biases."""
+    biases = (context or {}).get("biases") or {}
+    try:
+        if biases:
+            cats = list(biases.keys())
+            weights = [max(0.01, float(biases.get(c, 0.1))) for c in cats]
+            category = random.choices(cats, weights=weights, k=1)[0]
+            thought = f"Trying {category} (scenario bias)."
+        else:
+            category = _top_need_category(ag.needs)
+            thought = f"Heading to {category}."
+        mem = f"Chose {category} using bias-aware fallback."
+    except Exception:
+        category = "retail"
+        thought = "Fallback to retail."
+        mem = "Fallback path."
+    return category, thought, mem
+
+
+def _decide_batch(run_id: str, model: str, agents: List[SnapModel], context: Dict[str, Any]) -> List[Decision]:
+    # Ensure state
+    states = [get_state(run_id, ag.id) or init_agent(run_id, ag.id, ag.role) for ag in agents]
+    snaps = [ag.model_dump() for ag in agents]  # dumped once; the prompt builders only read them
+    batched: Dict[str, Any] = {}
+    if len(agents) > 1:
+        try:
+            batched = llm_decide_intents(model, list(zip(states, snaps)), context)
+        except Exception as e:
+            logging.warning(f"Batched LLM FAILED for {len(agents)} agents: {e}")
+    picks = []
+    for ag, st, snap in zip(agents, states, snaps):
+        res = batched.get(ag.id)
+        if res is not None:
+            category, thought, mem = res
+            logging.info(f"LLM SUCCESS for {ag.id} (batched): thought='{thought}', category={category}")
+        else:
+            # Not answered in the batch: single-agent prompt, then the rule-based fallback
+            try:
+                category, thought, mem = llm_decide_intent(model, st, snap, context)
+                logging.info(f"LLM SUCCESS for {ag.id}: thought='{thought}', category={category}")
+            except Exception as e:
+                logging.warning(f"LLM FAILED for {ag.id}: {e}")
+                category, thought, mem = _fallback_intent(ag, context)
+        picks.append((ag, category, thought, mem))
+    # One timestamp for the whole batch, taken once every decision is in
+    ts = _now_iso()
+    out: List[Decision] = []
+    for ag, category, thought, mem in picks:
+        append_memory(run_id, ag.id, MemoryEvent(ts=ts, kind="decision", text=mem, tags=[category]))
+        out.append(Decision(id=ag.id, next_intent=NextIntent(category=category), thought=thought, chat=None))
+    return out
+
+
 @app.post("/decide", response_model=DecideResp)
-def decide(req: DecideReq = Body(...)):
+async def decide(req: DecideReq = Body(...)):
     run = RUNS.get(req.runId)
     if not run:
         logging.warning(f"No run found for runId={req.runId}, processing anyway")
         # Process anyway for debugging
 
-    out: List[Decision] = []
     context = req.context or {}
-    meeting = context.get("meeting", False)
 
     model = "qwen2.5:3b-instruct"  # default local model name for Ollama; can be changed
-    # Sequential small-batch processing (client already batches + throttles). Keeps server simple and robust.
-    for ag in req.agents:
-        # Ensure state
-        st = get_state(req.runId, ag.id) or init_agent(req.runId, ag.id, ag.role)
-        try:
-            category, thought, mem = llm_decide_intent(model, st, ag.model_dump(), context)
-            logging.info(f"LLM SUCCESS for {ag.id}: thought='{thought}', category={category}")
-        except Exception as e:
-            logging.warning(f"LLM FAILED for {ag.id}: {e}")
-            # Bias-aware fallback: prefer categories present in context.biases
-            biases = (context or {}).get("biases") or {}
-            try:
-                if biases:
-                    cats = list(biases.keys())
-                    weights = [max(0.01, float(biases.get(c, 0.1))) for c in cats]
-                    import random as _r
-                    category = _r.choices(cats, weights=weights, k=1)[0]
-                    thought = f"Trying {category} (scenario bias)."
-                else:
-                    best_need, best_val = None, -1.0
-                    for k, v in (ag.needs or {}).items():
-                        if v is None: continue
-                        if v > best_val: best_need, best_val = k, v
-                    category = NEED_TO_CATEGORY.get(best_need or "leisure", "retail")
-                    thought = f"Heading to {category}."
-                mem = f"Chose {category} using bias-aware fallback."
-            except Exception:
-                category = "retail"
-                thought = "Fallback to retail."
-                mem = "Fallback path."
-        append_memory(req.runId, ag.id, MemoryEvent(ts=_now_iso(), kind="decision", text=mem, tags=[category]))
-        out.append(Decision(id=ag.id, next_intent=NextIntent(category=category), thought=thought, chat=None))
-        # Small delay to prevent overwhelming Ollama with concurrent requests
-        time.sleep(0.02)
-
-    # Append decisions to file
-    files = _ensure_run_dirs(req.runId)
-    with open(files["decisions"], "a", encoding="utf-8") as f:
-        for d in out:
-            f.write(json.dumps(d.model_dump(), ensure_ascii=False) + "\n")
-
-    if run: RUNS[req.runId]["decisions"] += len(out)
+    # Agents are split into multi-agent prompts of DECIDE_BATCH_SIZE, decided concurrently
+    # in worker threads with at most LLM_CONCURRENCY batches in flight server-wide
+    chunks = [req.agents[i:i + DECIDE_BATCH_SIZE] for i in range(0, len(req.agents), DECIDE_BATCH_SIZE)]
+    results = await asyncio.gather(
+        *(_run_llm(_decide_batch, req.runId, model, chunk, context) for chunk in chunks),
+        return_exceptions=True,
+    )
+    out: List[Decision] = []
+    for chunk, res in zip(chunks, results):
+        if isinstance(res, BaseException):
+            logging.warning(f"Decide failed for {[ag.id for ag in chunk]}: {res}")
+            res = []
+            for ag in chunk:
+                category, thought, _ = _fallback_intent(ag, context)
+                res.append(Decision(id=ag.id, next_intent=NextIntent(category=category), thought=thought, chat=None))
+        out.extend(res)
+
+    # Append decisions to file as one buffered write
+    files = _run_files(req.runId, run)
+    # model_dump_json encodes in pydantic-core directly, skipping the intermediate dict
+    payload = "".join([d.model_dump_json() + "\n" for d in out]).encode("utf-8")
+    _append(run, files["decisions"], payload)
+
+    # the local entry: /end_run may have popped the run from RUNS during the gather above
+    if run: run["decisions"] += len(out)
     logging.info(f"Decide processed {len(req.agents)} agents -> {len(out)} decisions")
     return DecideResp(decisions=out)
 
@@ -276,40 +461,53 @@ class ChatResp(BaseModel):
     pairs: List[Dict[str, str]]
 
 
+def _chat_pair(run_id: str, model: str, p: ChatPair, context: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    a = get_state(run_id, p.aId)
+    b = get_state(run_id, p.bId)
+    if not a or not b:
+        return None
+    res = llm_chat(model, a, b, context)
+    ts = _now_iso()
+    append_memory(run_id, p.aId, MemoryEvent(ts=ts, kind="chat", text=res["mem_a"], tags=["chat", p.bId]))
+    append_memory(run_id, p.bId, MemoryEvent(ts=ts, kind="chat", text=res["mem_b"], tags=["chat", p.aId]))
+    return {"aId": p.aId, "bId": p.bId, "a_line": res["a_line"], "b_line": res["b_line"]}
+
+
 @app.post("/chat", response_model=ChatResp)
-def chat(req: ChatReq = Body(...)):
-    out = []
+async def chat(req: ChatReq = Body(...)):
     model = "qwen2.5:3b-instruct"
-    for p in req.pairs:
-        a = get_state(req.runId, p.aId)
-        b = get_state(req.runId, p.bId)
-        if not a or not b:
-            continue
-        res = llm_chat(model, a, b, req.context or {})
-        out.append({"aId": p.aId, "bId": p.bId, "a_line": res["a_line"], "b_line": res["b_line"]})
-        append_memory(req.runId, p.aId, MemoryEvent(ts=_now_iso(), kind="chat", text=res["mem_a"], tags=["chat", p.bId]))
-        append_memory(req.runId, p.bId, MemoryEvent(ts=_now_iso(), kind="chat", text=res["mem_b"], tags=["chat", p.aId]))
-    return ChatResp(pairs=out)
+    # Pairs share the /decide limiter, so chat traffic counts against the same Ollama budget
+    results = await asyncio.gather(*(_run_llm(_chat_pair, req.runId, model, p, req.context or {}) for p in req.pairs))
+    return ChatResp(pairs=[r for r in results if r is not None])
 
 
 @app.post("/metrics", response_model=OkResp)
-def metrics(req: MetricsReq = Body(...)):
+async def metrics(req: MetricsReq = Body(...)):
     run = RUNS.get(req.runId)
     if not run:
         return OkResp(ok=False)
-    files = _ensure_run_dirs(req.runId)
-    with open(files["metrics"], "a", encoding="utf-8") as f:
-        for s in req.samples or []:
-            s["ts"] = _now_iso()
-            f.write(json.dumps(s, ensure_ascii=False) + "\n")
-    RUNS[req.runId]["samples"] += len(req.samples or [])
+    files = _run_files(req.runId, run)
+    ts = _now_iso()
+    for s in req.samples or []:
+        s["ts"] = ts
+    payload = b"".join(_dump_line(s) for s in req.samples or [])
+    # Count on the local entry before awaiting: a full queue yields, and /end_run may pop the run meanwhile
+    run["samples"] += len(req.samples or [])
+    if _METRICS_TASK is not None and not _METRICS_TASK.done():
+        await _METRICS_Q.put((run, files["metrics"], payload))
+    else:
+        # Writer not running (app started without its startup hook)
+        _append(run, files["metrics"], payload)
     return OkResp(ok=True)
 
 
 @app.post("/end_run", response_model=EndRunResp)
-def end_run(req: EndRunReq = Body(...)):
+async def end_run(req: EndRunReq = Body(...)):
     run = RUNS.pop(req.runId, None)
-    files = _ensure_run_dirs(req.runId)
+    if _METRICS_Q is not None and _METRICS_TASK is not None and not _METRICS_TASK.done():
+        await _METRICS_Q.join()  # queued samples land before the descriptors close
+    _close_fds(run)
+    files = _run_files(req.runId, run)
     summary = {
         "runId": req.runId,
         "hypothesisId": (run or {}).get("hypothesisId"),
@@ -318,8 +516,7 @@ def end_run(req: EndRunReq = Body(...)):
         "samples": (run or {}).get("samples", 0),
         "ended_at": _now_iso(),
     }
-    with open(files["summary"], "w", encoding="utf-8") as f:
-        json.dump(summary, f, indent=2)
+    _write_json(files["summary"], summary)
     logging.info("[run] end id=%s -> %s", req.runId, files["summary"])
     return EndRunResp(saved=files)
 
@@ -8,12 +8,19 @@ import json
 from PIL import Image, ImageDraw
 import os
 
+def make_circle_sprite(radius, fill, outline=(0, 0, 0)):
+    """RGBA marker identical to draw.ellipse((x-r, y-r, x+r, y+r), fill, outline) at (r, r)"""
+    size = 2 * radius + 1
+    sprite = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    ImageDraw.Draw(sprite).ellipse((0, 0, size - 1, size - 1), fill=tuple(fill) + (255,), outline=tuple(outline) + (255,))
+    return sprite
+
 def analyze_poi_building_mismatch():
     out_dir = "out/society145_1km"
     
-    # Load data
-    semantic = np.load(os.path.join(out_dir, "semantic.npy"))
-    feature_id = np.load(os.path.join(out_dir, "feature_id.npy"))
+    # Load data; memory-mapped so only the pages actually read are faulted in
+    semantic = np.load(os.path.join(out_dir, "semantic.npy"), mmap_mode='r')
+    feature_id = np.load(os.path.join(out_dir, "feature_id.npy"), mmap_mode='r')
     
     with open(os.path.join(out_dir, "pois.json"), 'r') as f:
         pois = json.load(f)
@@ -26,27 +33,23 @@ def analyze_poi_building_mismatch():
     
     print("=== POI-Building Mismatch Analysis ===")
     
+    # Gather the class under every in-bounds POI with one fancy index
+    locs = [poi.get('snapped') or poi for poi in pois]
+    ixs = np.fromiter((loc['ix'] for loc in locs), dtype=np.int64, count=len(locs))
+    iys = np.fromiter((loc['iy'] for loc in locs), dtype=np.int64, count=len(locs))
+    valid = (ixs >= 0) & (ixs < W) & (iys >= 0) & (iys < H)
+    ixs, iys = ixs[valid], iys[valid]
+    poi_classes = semantic[iys, ixs]
+    
     # Count POIs by semantic class they sit on
+    counts = np.bincount(poi_classes, minlength=10)
+    building_pois = int(counts[1])  # BUILDING
+    non_building_pois = len(poi_classes) - building_pois
+    # Classes in order of first appearance, so equal counts keep the original ordering
+    present, first_seen = np.unique(poi_classes, return_index=True)
     poi_by_class = {}
-    building_pois = 0
-    non_building_pois = 0
-    
-    for poi in pois:
-        loc = poi.get('snapped') or poi
-        ix, iy = loc['ix'], loc['iy']
-        
-        if 0 <= ix < W and 0 <= iy < H:
-            sem_class = semantic[iy, ix]
-            class_name = class_names.get(sem_class, f'unknown_{sem_class}')
-            
-            if class_name not in poi_by_class:
-                poi_by_class[class_name] = 0
-            poi_by_class[class_name] += 1
-            
-            if sem_class == 1:  # BUILDING
-                building_pois += 1
-            else:
-                non_building_pois += 1
+    for sem_class in present[np.argsort(first_seen)].tolist():
+        poi_by_class[class_names.get(sem_class, f'unknown_{sem_class}')] = int(counts[sem_class])
     
     print(f"POIs on buildings: {building_pois}")
     print(f"POIs NOT on buildings: {non_building_pois}")
@@ -55,18 +58,17 @@ def analyze_poi_building_mismatch():
         print(f"  {class_name}: {count}")
     
     # Create visualization
-    rgb = np.zeros((H, W, 3), dtype=np.uint8)
-    palette = {
-        0:(240,240,240), 1:(60,60,60), 2:(230,230,230), 3:(200,200,200),
-        4:(210,210,160), 5:(235,215,160), 6:(140,190,140), 7:(150,180,220),
-        8:(120,120,120), 9:(250,250,120)
-    }
-    
-    for cls, color in palette.items():
-        rgb[semantic == cls] = color
+    palette = np.array([
+        (240,240,240), (60,60,60), (230,230,230), (200,200,200),
+        (210,210,160), (235,215,160), (140,190,140), (150,180,220),
+        (120,120,120), (250,250,120)
+    ], dtype=np.uint8)
+    # Classes outside the palette stay black
+    lut = np.zeros((256, 3), dtype=np.uint8)
+    lut[:len(palette)] = palette
+    rgb = lut[semantic]
     
     img = Image.fromarray(rgb)
-    draw = ImageDraw.Draw(img)
     
     # Mark POIs by their underlying class
     colors = {
@@ -78,17 +80,18 @@ def analyze_poi_building_mismatch():
         'sidewalk': (173, 216, 230), # Light blue - questionable
     }
     
-    for poi in pois:
-        loc = poi.get('snapped') or poi
-        ix, iy = loc['ix'], loc['iy']
-        
-        if 0 <= ix < W and 0 <= iy < H:
-            sem_class = semantic[iy, ix]
-            class_name = class_names.get(sem_class, 'unknown')
-            color = colors.get(class_name, (128, 128, 128))
-            
-            # Draw larger circle for better visibility
-            draw.ellipse((ix-3, iy-3, ix+3, iy+3), fill=color, outline=(0,0,0))
+    # Resolve every marker colour up front; only the pastes stay per POI
+    class_colors = np.full((256, 3), 128, dtype=np.uint8)
+    for cls, name in class_names.items():
+        if name in colors:
+            class_colors[cls] = colors[name]
+    marker_colors = [tuple(c) for c in class_colors[poi_classes].tolist()]
+    
+    # Larger circle for better visibility; one pre-rendered sprite per colour, pasted through its own alpha
+    sprites = {color: make_circle_sprite(3, color) for color in set(marker_colors)}
+    for ix, iy, color in zip(ixs.tolist(), iys.tolist(), marker_colors):
+        sprite = sprites[color]
+        img.paste(sprite, (ix-3, iy-3), sprite)
     
     img.save(os.path.join(out_dir, "poi_building_debug.png"))
     print(f"\nSaved visualization to {os.path.join(out_dir, 'poi_building_debug.png')}")
@@ -7,6 +7,70 @@ import numpy as np
 import json
 from PIL import Image, ImageDraw
 import os
+from collections import deque
+
+try:
+    from scipy import ndimage
+    HAVE_SCIPY = True
+except ImportError:
+    HAVE_SCIPY = False
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+# 8-connectivity, matching the directions the flood fill and A* step through
+EIGHT_CONNECTED = np.ones((3, 3), dtype=np.int8)
+
+def _flood_from_labels(walkable, start):
+    """visited mask of the flood fill from start, via one compiled labeling pass"""
+    H, W = walkable.shape
+    sy, sx = start
+    labels, _ = ndimage.label(walkable == 1, structure=EIGHT_CONNECTED)
+    # The fill seeds start even when it is blocked, then spreads into its walkable neighbours
+    seeds = labels[max(0, sy - 1):min(H, sy + 2), max(0, sx - 1):min(W, sx + 2)]
+    seeds = np.unique(seeds[seeds > 0])
+    visited = labels == seeds[0] if len(seeds) == 1 else np.isin(labels, seeds)
+    visited[sy, sx] = True
+    return visited
+
+if HAVE_NUMBA:
+    @njit(cache=True)
+    def _flood(walkable, sy, sx):
+        """
+        Compiled BFS from (sy, sx) over 8-connected walkable cells.
+        The queue is a preallocated int32 array of flat indices (each cell is
+        enqueued at most once, so H*W slots never overflow). Returns
+        (visited as uint8, number of cells dequeued).
+        """
+        H, W = walkable.shape
+        visited = np.zeros((H, W), dtype=np.uint8)
+        queue = np.empty(H * W, dtype=np.int32)
+        head = 0
+        tail = 0
+        visited[sy, sx] = 1
+        queue[tail] = sy * W + sx
+        tail += 1
+        while head < tail:
+            p = queue[head]
+            head += 1
+            y = p // W
+            x = p - y * W
+            for dy in range(-1, 2):
+                ny = y + dy
+                if ny < 0 or ny >= H:
+                    continue
+                for dx in range(-1, 2):
+                    nx = x + dx
+                    if (dy == 0 and dx == 0) or nx < 0 or nx >= W:
+                        continue
+                    if visited[ny, nx] == 0 and walkable[ny, nx] == 1:
+                        visited[ny, nx] = 1
+                        queue[tail] = ny * W + nx
+                        tail += 1
+        return visited, head
 
 def analyze_connectivity(walkable, start, goal):
     """Analyze connectivity between start and goal using flood fill"""
@@ -19,23 +83,44 @@ def analyze_connectivity(walkable, start, goal):
     print(f"Goal walkable: {walkable[gy, gx]}")
     
     # Flood fill from start
-    visited = np.zeros_like(walkable, dtype=bool)
-    queue = [(sy, sx)]
-    visited[sy, sx] = True
-    reachable_count = 0
-    
-    directions = [(-1,-1),(-1,0),(-1,1),(0,-1),(0,1),(1,-1),(1,0),(1,1)]
-    
-    while queue:
-        y, x = queue.pop(0)
-        reachable_count += 1
-        
-        for dy, dx in directions:
-            ny, nx = y + dy, x + dx
-            if (0 <= ny < H and 0 <= nx < W and 
-                not visited[ny, nx] and walkable[ny, nx] == 1):
-                visited[ny, nx] = True
-                queue.append((ny, nx))
+    if HAVE_SCIPY:
+        visited = _flood_from_labels(walkable, start)
+        reachable_count = int(visited.sum())
+    elif HAVE_NUMBA:
+        visited, reachable_count = _flood(walkable, sy, sx)
+        visited = visited.view(bool)
+    else:
+        # Pure-Python fill over flat indices: bytes/bytearray lookups instead of
+        # numpy scalar indexing, and the 8 neighbour checks unrolled
+        wk = (walkable == 1).astype(np.uint8).tobytes()
+        vis = bytearray(H * W)
+        start_idx = sy * W + sx
+        vis[start_idx] = 1
+        queue = deque([start_idx])
+        popleft, push = queue.popleft, queue.append
+        reachable_count = 0
+        last_row, last_col = H - 1, W - 1
+
+        while queue:
+            p = popleft()  # O(1); list.pop(0) made the fill quadratic
+            reachable_count += 1
+            y, x = divmod(p, W)
+            left, right = x > 0, x < last_col
+
+            if y > 0:
+                q = p - W
+                if left and wk[q-1] and not vis[q-1]: vis[q-1] = 1; push(q-1)
+                if wk[q] and not vis[q]: vis[q] = 1; push(q)
+                if right and wk[q+1] and not vis[q+1]: vis[q+1] = 1; push(q+1)
+            if left and wk[p-1] and not vis[p-1]: vis[p-1] = 1; push(p-1)
+            if right and wk[p+1] and not vis[p+1]: vis[p+1] = 1; push(p+1)
+            if y < last_row:
+                q = p + W
+                if left and wk[q-1] and not vis[q-1]: vis[q-1] = 1; push(q-1)
+                if wk[q] and not vis[q]: vis[q] = 1; push(q)
+                if right and wk[q+1] and not vis[q+1]: vis[q+1] = 1; push(q+1)
+
+        visited = np.frombuffer(vis, dtype=np.uint8).reshape(H, W).view(bool)
     
     goal_reachable = visited[gy, gx]
     print(f"Goal reachable from start: {goal_reachable}")
@@ -48,16 +133,13 @@ def visualize_connectivity(walkable, visited, start, goal, output_path):
     """Create visualization of connectivity"""
     H, W = walkable.shape
     
-    # Create RGB image
-    rgb = np.zeros((H, W, 3), dtype=np.uint8)
-    
+    # Create RGB image; white (walkable but unreachable) is the fill, so no
+    # combined walkable & ~visited mask is needed
+    rgb = np.full((H, W, 3), 255, dtype=np.uint8)
+
     # Gray for non-walkable
-    rgb[walkable == 0] = (128, 128, 128)
-    
-    # White for walkable but unreachable
-    mask = (walkable == 1) & (~visited)
-    rgb[mask] = (255, 255, 255)
-    
+    rgb[walkable == 0] = 128
+
     # Green for reachable
     rgb[visited] = (0, 255, 0)
     
@@ -8,17 +8,79 @@ Scope v1: POI add/update only. We reuse the baseline navgraph and grids.
 
 from __future__ import annotations
 import os, json, shutil
-from typing import Dict, Tuple
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
 
 import numpy as np
 
+try:
+    import orjson
+    HAVE_ORJSON = True
+except ImportError:
+    HAVE_ORJSON = False
+
 from .scenario_models import Scenario, POIDef
 
 
+SNAP_RADIUS = 20
+# Every (dy, dx) in the snap window, nearest first (ties: smaller dy, then dx)
+_SNAP_OFFSETS = np.array(
+    sorted(((dy, dx) for dy in range(-SNAP_RADIUS, SNAP_RADIUS+1) for dx in range(-SNAP_RADIUS, SNAP_RADIUS+1)),
+           key=lambda o: (o[0]*o[0] + o[1]*o[1], o[0], o[1])),
+    dtype=np.int64,
+)
+
+
+def _snap_to_walkable(iy: int, ix: int, walkable: np.ndarray):
+    """Nearest walkable cell within SNAP_RADIUS (square window) of (iy, ix), or None."""
+    H, W = walkable.shape
+    ny = iy + _SNAP_OFFSETS[:, 0]
+    nx = ix + _SNAP_OFFSETS[:, 1]
+    inside = (ny >= 0) & (ny < H) & (nx >= 0) & (nx < W)
+    ny, nx = ny[inside], nx[inside]
+    hits = np.flatnonzero(walkable[ny, nx] == 1)
+    if not hits.size:
+        return None
+    k = hits[0]
+    return int(ny[k]), int(nx[k])
+
+
+# POI fields updates usually match on; indexed so each update only checks its candidates
+_INDEX_KEYS = ("id", "type", "name")
+
+
+def _index_pois(pois: List[Dict]) -> Dict[str, Dict]:
+    index = {k: defaultdict(list) for k in _INDEX_KEYS}
+    for i, p in enumerate(pois):
+        for k in _INDEX_KEYS:
+            index[k][p.get(k)].append(i)
+    return index
+
+
+def _candidates(index: Dict[str, Dict], n: int, match: Dict) -> Sequence[int]:
+    """Ascending POI indices that agree with match on every indexed key it names."""
+    keys = [k for k in _INDEX_KEYS if k in match]
+    if not keys:
+        return range(n)
+    try:
+        lists = [index[k].get(match[k], ()) for k in keys]
+    except TypeError:  # unhashable match value: can't be an index key, scan everything
+        return range(n)
+    first = min(lists, key=len)
+    others = [set(l) for l in lists if l is not first]
+    return [i for i in first if all(i in o for o in others)]
+
+
 def _load_baseline_assets(baseline_dir: str) -> Dict:
-    with open(os.path.join(baseline_dir, "pois.json"), "r", encoding="utf-8") as f:
-        pois = json.load(f)
-    walk = np.load(os.path.join(baseline_dir, "walkable.npy"))
+    path = os.path.join(baseline_dir, "pois.json")
+    if HAVE_ORJSON:
+        with open(path, "rb") as f:
+            pois = orjson.loads(f.read())
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            pois = json.load(f)
+    # Read-only map: snapping only touches a few cells around each added POI
+    walk = np.load(os.path.join(baseline_dir, "walkable.npy"), mmap_mode="r")
     return {"pois": pois, "walkable": walk}
 
 
@@ -41,11 +103,19 @@ def _place_poi(defn: POIDef, walkable: np.ndarray) -> Tuple[int,int]:
 
 def apply_scenario_to_assets(baseline_dir: str, scenario_path: str, out_dir: str) -> Dict:
     os.makedirs(out_dir, exist_ok=True)
-    # Copy navgraph/grids directly (no topology edits in v1)
+    # Link navgraph/grids directly (no topology edits in v1). These are shared
+    # with the baseline, so nothing downstream may write to them; scenario edits
+    # only ever produce a fresh pois.json. Copy where hardlinks aren't possible.
     for fname in ("semantic.npy", "walkable.npy", "cost.npy", "feature_id.npy", "navgraph.npz", "labels.json", "feature_table.json"):
         src = os.path.join(baseline_dir, fname)
         if os.path.exists(src):
-            shutil.copy2(src, os.path.join(out_dir, fname))
+            dst = os.path.join(out_dir, fname)
+            if os.path.lexists(dst):
+                os.remove(dst)  # never copy onto an existing link into the baseline
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
 
     assets = _load_baseline_assets(baseline_dir)
     walkable = assets["walkable"]
@@ -60,15 +130,7 @@ def apply_scenario_to_assets(baseline_dir: str, scenario_path: str, out_dir: str
         iy, ix = _place_poi(pd, walkable)
         # Snap to walkable if target cell isn't walkable
         if not (0 <= ix < walkable.shape[1] and 0 <= iy < walkable.shape[0]) or walkable[iy, ix] == 0:
-            # naive outward search within 20 cells
-            found = None
-            for r in range(1, 21):
-                y0, y1 = max(0, iy-r), min(walkable.shape[0]-1, iy+r)
-                x0, x1 = max(0, ix-r), min(walkable.shape[1]-1, ix+r)
-                sub = np.argwhere(walkable[y0:y1+1, x0:x1+1] == 1)
-                if sub.size:
-                    vy, vx = sub[0]
-                    found = (y0+int(vy), x0+int(vx)); break
+            found = _snap_to_walkable(iy, ix, walkable)
             if found: iy, ix = found
         pois.append({
             "type": pd.type,
@@ -84,19 +146,29 @@ def apply_scenario_to_assets(baseline_dir: str, scenario_path: str, out_dir: str
             if p.get(k) != v: return False
         return True
 
+    index = _index_pois(pois)
     for upd in sc.poi_update:
-        for p in pois:
+        hit = False
+        for i in _candidates(index, len(pois), upd.match):
+            p = pois[i]
             if _matches(p, upd.match):
+                hit = True
                 for k, v in (upd.set or {}).items():
                     if k == "tags" and isinstance(v, dict):
                         tags = p.get("tags") or {}
                         tags.update(v); p["tags"] = tags
                     else:
                         p[k] = v
+        if hit and any(k in _INDEX_KEYS for k in (upd.set or {})):
+            index = _index_pois(pois)  # later updates must see the renamed/retyped POIs
 
     # Write pois.json
-    with open(os.path.join(out_dir, "pois.json"), "w", encoding="utf-8") as f:
-        json.dump(pois, f, indent=2)
+    if HAVE_ORJSON:
+        with open(os.path.join(out_dir, "pois.json"), "wb") as f:
+            f.write(orjson.dumps(pois, option=orjson.OPT_INDENT_2))
+    else:
+        with open(os.path.join(out_dir, "pois.json"), "w", encoding="utf-8") as f:
+            json.dump(pois, f, indent=2)
 
     # Simple overlay for debug: mark added POIs in green
     summary = {"poi_count": len(pois), "added": len(sc.poi_add)}
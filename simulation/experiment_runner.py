@@ -10,65 +10,119 @@ the pipeline end-to-end before adding full stepping/pathing.
 
 from __future__ import annotations
 import os, json, time, uuid, random
+from functools import lru_cache
 from typing import List, Dict, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 
-from .scenario_models import ExperimentConfig
+try:
+    import orjson
+    HAVE_ORJSON = True
+except ImportError:
+    HAVE_ORJSON = False
+
+from .scenario_models import ExperimentConfig, Scenario
 from .metrics import MetricsAggregator, build_final_analytics
 from .environment_editor import apply_scenario_to_assets
-from .needs_and_objectives import build_need_biases_for_scenario, inject_bias_into_snapshot
+from .needs_and_objectives import build_need_biases_for_scenario
 
 
 BRAIN = "http://127.0.0.1:9000"
 
+# Pooled keep-alive connections to the brain server, shared by every call in the process
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+
 
 def _read_json(path: str) -> Dict:
+    if HAVE_ORJSON:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
 def _write_json(path: str, obj: Dict) -> None:
     os.makedirs(os.path.dirname(path), exist_ok=True)
+    if HAVE_ORJSON:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+        return
     with open(path, "w", encoding="utf-8") as f:
         json.dump(obj, f, indent=2)
 
 
-def _load_navgraph(assets_dir: str) -> Tuple["np.ndarray","np.ndarray"]:
+@lru_cache(maxsize=8)
+def _load_navgraph_cached(nz: str, mtime_ns: int) -> Tuple["np.ndarray","np.ndarray"]:
     import numpy as np
-    nz = os.path.join(assets_dir, "navgraph.npz")
-    data = np.load(nz)
-    walkable = data["walkable"].astype(np.uint8)
-    cost = data["cost"].astype(np.uint8)
+    # navgraph.npz is compressed, so it can't be memory-mapped; the producer
+    # already stores uint8, so each member is decoded once and never copied
+    with np.load(nz) as data:
+        walkable = data["walkable"].astype(np.uint8, copy=False)
+        cost = data["cost"].astype(np.uint8, copy=False)
     return walkable, cost
 
 
-def _nearest_path_len(assets_dir: str, category: str, start_iy: int, start_ix: int) -> float:
-    """Compute A* path length in grid steps to nearest POI of category. Returns inf if none."""
-    import numpy as np
-    from .nav_and_pois import astar
+def _load_navgraph(assets_dir: str) -> Tuple["np.ndarray","np.ndarray"]:
+    """(walkable, cost) for assets_dir, decoded once per navgraph.npz version. Treat as read-only."""
+    nz = os.path.join(assets_dir, "navgraph.npz")
+    return _load_navgraph_cached(nz, os.stat(nz).st_mtime_ns)
 
-    with open(os.path.join(assets_dir, "pois.json"), "r", encoding="utf-8") as f:
-        pois = json.load(f)
-    walkable, cost = _load_navgraph(assets_dir)
-    H, W = walkable.shape
-    best = float("inf")
+
+@lru_cache(maxsize=8)
+def _load_poi_cells_cached(path: str, mtime_ns: int, H: int, W: int) -> Dict[str, Tuple[Tuple[int,int], ...]]:
+    pois = _read_json(path)
+    cells: Dict[str, List[Tuple[int,int]]] = {}
     for p in pois:
-        if p.get("type") != category:
-            continue
         loc = p.get("snapped") or {"iy": p.get("iy"), "ix": p.get("ix")}
-        if loc is None: continue
-        gy, gx = int(loc["iy"]), int(loc["ix"]) 
+        if loc.get("iy") is None or loc.get("ix") is None:
+            continue
+        gy, gx = int(loc["iy"]), int(loc["ix"])
         if not (0<=gx<W and 0<=gy<H):
             continue
-        path = astar(cost, walkable, (start_iy, start_ix), (gy, gx))
-        if path:
-            best = min(best, float(len(path)))
-    return best
+        cells.setdefault(p.get("type"), []).append((gy, gx))
+    return {cat: tuple(v) for cat, v in cells.items()}
+
+
+def _load_poi_cells(assets_dir: str, H: int, W: int) -> Dict[str, Tuple[Tuple[int,int], ...]]:
+    """In-bounds POI grid cells (snapped when available) grouped by category, parsed once per pois.json version."""
+    path = os.path.join(assets_dir, "pois.json")
+    return _load_poi_cells_cached(path, os.stat(path).st_mtime_ns, H, W)
+
+
+@lru_cache(maxsize=32)
+def _cat_steps_cached(assets_dir: str, category: str, nav_mtime_ns: int, pois_mtime_ns: int) -> "np.ndarray":
+    from .nav_and_pois import multi_source_steps
+    walkable, _ = _load_navgraph(assets_dir)
+    H, W = walkable.shape
+    return multi_source_steps(walkable, _load_poi_cells(assets_dir, H, W).get(category, ()))
+
+
+def _cat_steps(assets_dir: str, category: str) -> "np.ndarray":
+    """Per-cell step count to the nearest POI of category (-1 = unreachable): one
+    multi-source BFS per (assets_dir, category) instead of an A* per POI per query."""
+    return _cat_steps_cached(
+        assets_dir, category,
+        os.stat(os.path.join(assets_dir, "navgraph.npz")).st_mtime_ns,
+        os.stat(os.path.join(assets_dir, "pois.json")).st_mtime_ns,
+    )
+
+
+def _nearest_path_len(assets_dir: str, category: str, start_iy: int, start_ix: int) -> float:
+    """Path length in grid cells (start and goal included) to nearest POI of category. Returns inf if none."""
+    walkable, _ = _load_navgraph(assets_dir)
+    H, W = walkable.shape
+    if not (0<=start_ix<W and 0<=start_iy<H) or walkable[start_iy, start_ix] == 0:
+        return float("inf")
+    d = int(_cat_steps(assets_dir, category)[start_iy, start_ix])
+    return float(d + 1) if d >= 0 else float("inf")
 
 
 def run_single_scenario(exp_id: str, scenario_path: str, cfg: ExperimentConfig) -> Dict:
-    sc = _read_json(scenario_path)
-    sc_id = sc["id"]
+    # Validate straight from the file bytes; no dict -> str -> model round trip
+    with open(scenario_path, "rb") as f:
+        s = Scenario.model_validate_json(f.read())
+    sc_id = s.id
     out_dir = os.path.join(cfg.exp_out_dir, exp_id, sc_id)
     os.makedirs(out_dir, exist_ok=True)
 
@@ -77,7 +131,6 @@ def run_single_scenario(exp_id: str, scenario_path: str, cfg: ExperimentConfig)
     apply_scenario_to_assets(cfg.baseline_dir, scenario_path, assets_out)
 
     # 2) Initialize metrics aggregator
-    from .metrics import MetricsAggregator
     metrics = MetricsAggregator(exp_id, sc_id, bins=25, duration_s=cfg.duration_s)
     
     # 3) Skip brain server - generate run_id directly
@@ -86,7 +139,7 @@ def run_single_scenario(exp_id: str, scenario_path: str, cfg: ExperimentConfig)
     # 4) Create agent snapshots with scenario biases
     walk = os.path.join(assets_out, "walkable.npy")
     import numpy as np
-    walkable = np.load(walk)
+    walkable = np.load(walk, mmap_mode="r")  # only the shape is needed; mapping reads just the header
     H, W = walkable.shape
     cy, cx = H//2, W//2
 
@@ -94,9 +147,7 @@ def run_single_scenario(exp_id: str, scenario_path: str, cfg: ExperimentConfig)
     roles = ["student", "resident", "worker"]
     random.seed(cfg.seed)
     
-    from .scenario_models import Scenario
     from .needs_and_objectives import seed_needs
-    s = Scenario.model_validate_json(json.dumps(sc))
     biases = build_need_biases_for_scenario(s)
     
     for i in range(cfg.agent_count):
@@ -125,6 +176,16 @@ def run_single_scenario(exp_id: str, scenario_path: str, cfg: ExperimentConfig)
     weights = [biases.get(c, 0.25) for c in cats]
     weight_sum = sum(weights) or 1.0
     weights = [w/weight_sum for w in weights]
+    # Inverse-CDF sampler: one searchsorted per step draws every agent's category
+    rng = np.random.default_rng(cfg.seed)
+    cats_arr = np.array(cats, dtype=object)
+    cdf = np.cumsum(weights) if sum(weights) > 0 else np.arange(1, len(cats) + 1) / len(cats)
+    cdf[-1] = 1.0  # guard against rounding so every draw in [0, 1) lands on a category
+    agent_ids = [a["id"] for a in agents]
+    n_agents = len(agents)
+    # Whether each category has a POI added by this scenario, resolved once per category
+    new_poi_types = frozenset(p.type for p in s.poi_add)
+    cat_is_new = np.array([c in new_poi_types for c in cats], dtype=bool)
     
     while step_count < max_steps:
         elapsed = time.time() - start_time
@@ -132,44 +193,34 @@ def run_single_scenario(exp_id: str, scenario_path: str, cfg: ExperimentConfig)
             break
             
         # Fast weighted random decisions (no LLM calls)
-        decisions = []
-        for a in agents:
-            cat = random.choices(cats, weights=weights, k=1)[0]
-            decisions.append({"id": a["id"], "next_intent": {"category": cat}, "thought": f"Heading to {cat}."})
-
-        # Process decisions and simulate arrivals/purchases
-        for decision in decisions:
-            agent_id = decision["id"]
-            intent = decision.get("next_intent", {})
-            category = intent.get("category", "unknown")
-            
-            if category != "unknown":
-                metrics.record_decision(agent_id, category, elapsed)
-                
-                # Simulate travel and arrival (fast)
-                if random.random() < 0.8:  # 80% success rate
-                    travel_time = random.uniform(1.0, 5.0)  # 1-5 seconds
-                    path_len = random.randint(10, 50)  # 10-50 cells
-                    metrics.record_arrival(agent_id, category, path_len, travel_time, elapsed + travel_time)
-                    
-                    # Simulate spending at new POIs
-                    if random.random() < 0.7:  # 70% purchase rate
-                        # Higher spending at new scenario POIs
-                        is_new_poi = any(poi.type == category for poi in s.poi_add)
-                        base_spend = random.uniform(5.0, 25.0)
-                        if is_new_poi:
-                            spend = base_spend * random.uniform(1.3, 2.5)  # 30-150% more at new POIs
-                        else:
-                            spend = base_spend
-                        metrics.record_purchase(agent_id, category, spend, elapsed + travel_time)
+        # Decisions are just the parallel (agent_ids, chosen) sequences; no per-agent dicts
+        cat_idx = np.searchsorted(cdf, rng.random(n_agents), side="right")
+        chosen = cats_arr[cat_idx]
+        metrics.record_decision_batch(agent_ids, chosen, elapsed)
+
+        # Simulate travel and arrival (fast), all agents' draws at once
+        arrived = rng.random(n_agents) < 0.8  # 80% success rate
+        n_arr = int(arrived.sum())
+        travel_time = rng.uniform(1.0, 5.0, n_arr)  # 1-5 seconds
+        path_len = rng.integers(10, 51, n_arr)  # 10-50 cells
+        arrive_t = elapsed + travel_time
+        metrics.record_arrival_batch(chosen[arrived], path_len, travel_time, arrive_t)
+
+        # Simulate spending, higher at new scenario POIs
+        bought = rng.random(n_arr) < 0.7  # 70% purchase rate
+        n_buy = int(bought.sum())
+        spend = rng.uniform(5.0, 25.0, n_buy)
+        is_new_poi = cat_is_new[cat_idx[arrived][bought]]
+        spend[is_new_poi] *= rng.uniform(1.3, 2.5, int(is_new_poi.sum()))  # 30-150% more at new POIs
+        metrics.record_purchase_batch(spend, arrive_t[bought])
 
         step_count += 1
         # No sleep for maximum speed
         
-        if step_count % 5 == 0:
+        if cfg.verbose and step_count % 5 == 0:
             print(f"  Step {step_count}/{max_steps}, elapsed: {elapsed:.1f}s")
 
-    print(f"✅ Completed {sc_id} simulation in {time.time() - start_time:.1f}s")
+    print(f"✅ Completed {sc_id} simulation ({step_count}/{max_steps} steps) in {time.time() - start_time:.1f}s")
 
     # 6) Generate summary
     summary = {
@@ -188,7 +239,6 @@ def run_single_scenario(exp_id: str, scenario_path: str, cfg: ExperimentConfig)
 def run_experiment(exp_id: str, scenario_paths: List[str], cfg: ExperimentConfig) -> Dict:
     """Run multiple scenarios IN PARALLEL and generate real analytics.json from agent behavior."""
     import concurrent.futures
-    import threading
     
     # Map scenario file -> env keys
     def env_key_for(path: str) -> str:
@@ -204,8 +254,9 @@ def run_experiment(exp_id: str, scenario_paths: List[str], cfg: ExperimentConfig
 
     print(f"🚀 Running {len(scenario_paths)} scenarios in PARALLEL...")
     
-    # Run ALL scenarios in parallel using ThreadPoolExecutor
-    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+    # Run ALL scenarios in parallel, one process each so the CPU-bound work isn't serialized
+    # on the GIL; summaries and MetricsAggregator results are plain objects and pickle back
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max(1, min(4, len(scenario_paths)))) as executor:
         # Submit all scenarios
         future_to_path = {
             executor.submit(run_single_scenario, exp_id, path, cfg): path 
@@ -253,7 +304,7 @@ if __name__ == "__main__":
     ]
     # Ensure brain server is up; warmup helps cold start
     try:
-        requests.post(f"{BRAIN}/warmup", timeout=60)
+        _session.post(f"{BRAIN}/warmup", timeout=60)
     except Exception:
         pass
     out = run_experiment(exp_id, scenarios, cfg)
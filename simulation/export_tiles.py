@@ -18,12 +18,18 @@ Note: This exporter creates placeholder visuals based on the class palette.
 """
 
 from __future__ import annotations
-import os, json, struct, hashlib, math
+import os, json, struct, math
 from typing import Dict, List, Tuple
 
 import numpy as np
 from PIL import Image
 
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
 # Semantic classes (must match osm_to_grid.py)
 VOID, BUILDING, SIDEWALK, FOOTPATH, PARKING, PLAZA, GREEN, WATER, ROAD, CROSSING = range(10)
 CLASS_NAMES = {
@@ -44,11 +50,26 @@ def _ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
+_M1 = np.uint64(0x9E3779B97F4A7C15)
+_M2 = np.uint64(0xBF58476D1CE4E5B9)
+_M3 = np.uint64(0x94D049BB133111EB)
+
+
+def _seeded_rand_vec(y: np.ndarray, x: np.ndarray, cls: np.ndarray) -> np.ndarray:
+    """Deterministic noise in [0, 1) per cell: a splitmix64-style integer hash over broadcast uint64 arrays."""
+    k = (np.asarray(y).astype(np.uint64) * _M1) ^ (np.asarray(x).astype(np.uint64) * _M2) ^ (np.asarray(cls).astype(np.uint64) * _M3)
+    k += _M1  # splitmix increment, so the (0, 0, 0) cell doesn't hash to 0
+    k ^= k >> np.uint64(30)
+    k *= _M2
+    k ^= k >> np.uint64(27)
+    k *= _M3
+    k ^= k >> np.uint64(31)
+    return (k >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
 def _seeded_rand(y: int, x: int, cls: int) -> float:
-    # Deterministic small noise per cell
-    h = hashlib.blake2b(f"{y},{x},{cls}".encode("utf-8"), digest_size=8).digest()
-    val = int.from_bytes(h, "little")
-    return (val % 10000) / 10000.0
+    # Deterministic small noise per cell (scalar form of _seeded_rand_vec)
+    return float(_seeded_rand_vec(np.atleast_1d(y), np.atleast_1d(x), np.atleast_1d(cls))[0])
 
 
 def _variant_for_cell(y: int, x: int, cls: int, semantic: np.ndarray = None) -> int:
@@ -100,7 +121,10 @@ def build_placeholder_atlas(out_tiles_dir: str) -> Dict:
     W = cols * TILE_SIZE
     H = rows * TILE_SIZE
 
-    img = Image.new("RGB", (W, H), (0,0,0))
+    atlas = np.zeros((H, W, 3), dtype=np.uint8)
+    # Sparse checker pattern shared by every tile
+    yy, xx = np.mgrid[0:TILE_SIZE, 0:TILE_SIZE]
+    mask = ((xx ^ yy) & 3) == 0
 
     frames: List[Dict] = []
     for row, class_id in enumerate(range(10)):
@@ -110,22 +134,12 @@ def build_placeholder_atlas(out_tiles_dir: str) -> Dict:
         for col in range(VARIANTS):
             x0 = col * TILE_SIZE
             y0 = row * TILE_SIZE
-            # Fill with shaded color plus tiny checker to hint texture
-            shade = _shade(base, factors[col])
-            tile = Image.new("RGB", (TILE_SIZE, TILE_SIZE), shade)
-            px = tile.load()
-            for yy in range(TILE_SIZE):
-                for xx in range(TILE_SIZE):
-                    if ((xx ^ yy) & 3) == 0:  # sparse pattern
-                        # subtle noise
-                        k = 0.97 + 0.06 * (((xx*31 + yy*17 + class_id*13 + col*7) % 100) / 100.0)
-                        rr, gg, bb = px[xx, yy]
-                        px[xx, yy] = (
-                            max(0, min(255, int(rr * k))),
-                            max(0, min(255, int(gg * k))),
-                            max(0, min(255, int(bb * k))),
-                        )
-            img.paste(tile, (x0, y0))
+            # Fill with shaded color plus tiny checker (subtle noise) to hint texture
+            tile = np.empty((TILE_SIZE, TILE_SIZE, 3), dtype=np.float64)
+            tile[...] = _shade(base, factors[col])
+            k = 0.97 + 0.06 * (((xx*31 + yy*17 + class_id*13 + col*7) % 100) / 100.0)
+            tile[mask] *= k[mask, None]
+            atlas[y0:y0+TILE_SIZE, x0:x0+TILE_SIZE] = np.clip(tile, 0, 255).astype(np.uint8)
 
             frames.append({
                 "name": f"{CLASS_NAMES[class_id]}_v{col}",
@@ -137,7 +151,7 @@ def build_placeholder_atlas(out_tiles_dir: str) -> Dict:
             })
 
     atlas_path = os.path.join(out_tiles_dir, "atlas.png")
-    img.save(atlas_path)
+    Image.fromarray(atlas, "RGB").save(atlas_path)
     return {
         "image": "atlas.png",
         "width": W,
@@ -146,19 +160,69 @@ def build_placeholder_atlas(out_tiles_dir: str) -> Dict:
     }
 
 
+if HAVE_NUMBA:
+    @njit(inline="always")
+    def _variant_nb(y, x, cls, semantic):
+        """_variant_for_cell in plain int64 math (y, x >= 0 keep every hash non-negative)"""
+        h = (y * 73856093) ^ (x * 19349663)
+        if cls == BUILDING:
+            H, W = semantic.shape
+            is_edge = ((y > 0 and semantic[y-1, x] != BUILDING) or (y < H-1 and semantic[y+1, x] != BUILDING)
+                       or (x > 0 and semantic[y, x-1] != BUILDING) or (x < W-1 and semantic[y, x+1] != BUILDING))
+            if is_edge:
+                r = h % 100
+                if r < 25:
+                    return 1
+                elif r < 30:
+                    return 2
+                return 0
+            return 0 if h % 10 < 8 else 2
+        return (h ^ (cls * 83492791)) % VARIANTS
+
+    @njit(parallel=True, cache=True, boundscheck=False)
+    def _build_tile_grid_nb(semantic):
+        H, W = semantic.shape
+        grid = np.empty((H, W), dtype=np.uint16)
+        for y in prange(H):
+            for x in range(W):
+                cls = np.int64(semantic[y, x])
+                if cls < 0 or cls > 9:
+                    cls = VOID
+                grid[y, x] = cls * VARIANTS + _variant_nb(np.int64(y), np.int64(x), cls, semantic)
+        return grid
+
+
 def build_tile_grid(semantic: np.ndarray) -> np.ndarray:
+    """Tile index per cell (class_id * VARIANTS + _variant_for_cell): row-parallel compiled loop when numba is installed."""
+    if HAVE_NUMBA:
+        return _build_tile_grid_nb(np.ascontiguousarray(semantic))
+    return _build_tile_grid_np(semantic)
+
+
+def _build_tile_grid_np(semantic: np.ndarray) -> np.ndarray:
+    """Same choice as _variant_for_cell, computed over the whole grid at once."""
     H, W = semantic.shape
-    grid = np.zeros((H, W), dtype=np.uint16)
-    # Fill by class; compute variant deterministically with semantic awareness
-    for y in range(H):
-        row = semantic[y]
-        for x in range(W):
-            cls = int(row[x])
-            if cls < 0 or cls > 9:
-                cls = VOID
-            v = _variant_for_cell(y, x, cls, semantic)  # Pass semantic for smart building selection
-            grid[y, x] = cls * VARIANTS + v
-    return grid
+    ys = np.arange(H, dtype=np.int64)[:, None]
+    xs = np.arange(W, dtype=np.int64)[None, :]
+    cls = semantic.astype(np.int64)
+    cls[(cls < 0) | (cls > 9)] = VOID
+
+    # Default random selection for non-buildings (products stay positive, so no abs needed)
+    yx = (ys * 73856093) ^ (xs * 19349663)
+    v = ((yx ^ (cls * 83492791)) % VARIANTS).astype(np.uint16)
+
+    # Buildings: edge = any in-bounds 4-neighbour is not a building; pad with
+    # BUILDING so off-grid neighbours never count as an edge
+    is_bldg = cls == BUILDING
+    bp = np.pad(semantic == BUILDING, 1, constant_values=True)
+    is_edge = ~(bp[:-2, 1:-1] & bp[2:, 1:-1] & bp[1:-1, :-2] & bp[1:-1, 2:])
+    hb = yx % 100
+    # Edge cells: 70% basic, 25% door (1), 5% corner (2); interior: 80% basic, 20% corner
+    edge_v = np.where(hb < 25, 1, np.where(hb < 30, 2, 0))
+    interior_v = np.where(hb % 10 < 8, 0, 2)
+    v = np.where(is_bldg, np.where(is_edge, edge_v, interior_v), v)
+
+    return (cls * VARIANTS + v).astype(np.uint16)
 
 
 def save_tile_grid_binary(path: str, grid: np.ndarray) -> None:
@@ -6,9 +6,22 @@ Tiny client for a local Ollama server (http://127.0.0.1:11434).
 
 from __future__ import annotations
 import json
+import os
 import httpx
 
 OLLAMA_URL = "http://127.0.0.1:11434"
+
+
+def _keep_alive(value: str):
+    """Ollama takes seconds as a number (-1 = stay loaded) or a duration string like '30m'."""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+# Keep the model resident between calls so prompts never pay a reload
+KEEP_ALIVE = _keep_alive(os.getenv("OLLAMA_KEEP_ALIVE", "-1"))
 # Reuse a single HTTP client for connection pooling/keep-alive
 _CLIENT: httpx.Client | None = None
 
@@ -39,6 +52,7 @@ def call_json(model: str, system: str, prompt: str, schema: dict, temperature: f
         "options": {"temperature": temperature, "num_ctx": 4096},
         "system": system,
         "stream": False,
+        "keep_alive": KEEP_ALIVE,
     }
     cli = _client(timeout)
     r = cli.post(f"{OLLAMA_URL}/api/generate", json=req)
@@ -4,7 +4,8 @@ from __future__ import annotations
 
 import math
 import time
-from typing import Dict, List, Tuple, Optional
+import numpy as np
+from typing import Dict, List, Tuple, Optional, Sequence
 
 
 class MetricsAggregator:
@@ -47,6 +48,16 @@ class MetricsAggregator:
             idx = self.bins - 1
         return idx
 
+    def _bin_idx_array(self, t_s: np.ndarray) -> np.ndarray:
+        # Vector form of _bin_idx: floor of a non-negative value is truncation
+        return np.minimum((np.maximum(t_s, 0.0) / self.bin_w).astype(np.int64), self.bins - 1)
+
+    @staticmethod
+    def _add_binned(acc: List, idx: np.ndarray, values: Optional[np.ndarray] = None) -> None:
+        totals = np.bincount(idx, weights=values, minlength=len(acc))
+        for i in np.flatnonzero(totals).tolist():
+            acc[i] += totals[i].item()
+
     # --- API ---
     def start_run(self, start_ts: float, agent_count: int) -> None:
         self.start_ts = start_ts
@@ -55,6 +66,10 @@ class MetricsAggregator:
     def record_decision(self, agent_id: str, category: str, t_s: float) -> None:
         self.decisions[self._bin_idx(t_s)] += 1
 
+    def record_decision_batch(self, agent_ids: Sequence[str], categories: Sequence[str], t_s: float) -> None:
+        """record_decision for a whole step at once (every decision shares t_s, so one bin)."""
+        self.decisions[self._bin_idx(t_s)] += len(categories)
+
     def record_departure(self, agent_id: str, from_pos: Tuple[int, int], to_pos: Tuple[int, int], category: str, t_s: float) -> None:
         # kept for parity, no-op in this simplified aggregator
         pass
@@ -71,6 +86,28 @@ class MetricsAggregator:
     def record_purchase(self, agent_id: str, category: str, amount: float, t_s: float) -> None:
         self.spend[self._bin_idx(t_s)] += float(amount)
 
+    # --- batch API (parallel arrays; same accounting as the per-call methods) ---
+    def record_arrival_batch(self, categories: np.ndarray, path_len_cells: np.ndarray, travel_time_s: np.ndarray, t_s: np.ndarray) -> None:
+        if not len(t_s):
+            return
+        travel_time_s = np.asarray(travel_time_s, dtype=np.float64)
+        idx = self._bin_idx_array(np.asarray(t_s, dtype=np.float64))
+        self._add_binned(self.arrivals, idx)
+        self._add_binned(self.walk_cells, idx, np.asarray(path_len_cells, dtype=np.float64))
+        self._add_binned(self.travel_time, idx, travel_time_s)
+        # category timing cache
+        cats, inverse = np.unique(np.asarray(categories), return_inverse=True)
+        sums = np.bincount(inverse, weights=travel_time_s, minlength=len(cats))
+        counts = np.bincount(inverse, minlength=len(cats))
+        for k, category in enumerate(cats.tolist()):
+            s, c = self.cat_time.get(category, (0.0, 0))
+            self.cat_time[category] = (s + sums[k].item(), c + int(counts[k]))
+
+    def record_purchase_batch(self, amounts: np.ndarray, t_s: np.ndarray) -> None:
+        if not len(t_s):
+            return
+        self._add_binned(self.spend, self._bin_idx_array(np.asarray(t_s, dtype=np.float64)), np.asarray(amounts, dtype=np.float64))
+
     # --- summarization ---
     def _avg_cat_time(self) -> Dict[str, float]:
         out: Dict[str, float] = {}
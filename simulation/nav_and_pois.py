@@ -28,6 +28,19 @@ import pyproj
 from shapely.geometry import Point, MultiPoint, Polygon
 from shapely.ops import transform
 from heapq import heappush, heappop
+from collections import deque
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+try:
+    from scipy.spatial import cKDTree
+    HAVE_SCIPY = True
+except ImportError:
+    HAVE_SCIPY = False
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
 
@@ -129,14 +142,21 @@ def cluster_commercial_pois(pois: List[Dict], *, cell_eps: int = 10, min_pts: in
     pts = [(p.get("snapped") or {"iy":p["iy"],"ix":p["ix"]}) for p in pois]
     used = [False]*len(pts)
     clusters: List[List[Dict]] = []
+    # Chebyshev (p=inf) ball queries on a KD-tree replace the all-pairs scan
+    tree = cKDTree([(q["iy"], q["ix"]) for q in pts]) if HAVE_SCIPY and pts else None
     for i, p in enumerate(pts):
         if used[i]: continue
         neigh = [i]
-        for j, q in enumerate(pts):
-            if i==j or used[j]:
-                continue
-            if abs(p["iy"]-q["iy"]) <= cell_eps and abs(p["ix"]-q["ix"]) <= cell_eps:
-                neigh.append(j)
+        if tree is not None:
+            for j in sorted(tree.query_ball_point((p["iy"], p["ix"]), r=cell_eps, p=np.inf)):
+                if i != j and not used[j]:
+                    neigh.append(j)
+        else:
+            for j, q in enumerate(pts):
+                if i==j or used[j]:
+                    continue
+                if abs(p["iy"]-q["iy"]) <= cell_eps and abs(p["ix"]-q["ix"]) <= cell_eps:
+                    neigh.append(j)
         if len(neigh) >= min_pts:
             for j in neigh: used[j]=True
             clusters.append([pois[j] for j in neigh])
@@ -234,6 +254,64 @@ def astar(cost: np.ndarray, walkable: np.ndarray, start: Tuple[int,int], goal: T
                 heappush(openq, (ng + h(ny,nx), ng, ny, nx))
     logging.warning("[step3][A*] no path found"); return None
 
+# ---------- Multi-source step distances ----------
+if HAVE_NUMBA:
+    @njit(cache=True)
+    def _bfs_steps_numba(walkable, src):
+        H, W = walkable.shape
+        dist = np.full((H, W), -1, dtype=np.int32)
+        queue = np.empty(H * W, dtype=np.int32)
+        head = 0
+        tail = 0
+        for i in range(src.shape[0]):
+            y, x = src[i, 0], src[i, 1]
+            if dist[y, x] == -1:
+                dist[y, x] = 0
+                queue[tail] = y * W + x
+                tail += 1
+        while head < tail:
+            p = queue[head]
+            head += 1
+            y = p // W
+            x = p - y * W
+            d = dist[y, x] + 1
+            for dy in range(-1, 2):
+                ny = y + dy
+                if ny < 0 or ny >= H:
+                    continue
+                for dx in range(-1, 2):
+                    nx = x + dx
+                    if nx < 0 or nx >= W or dist[ny, nx] != -1 or walkable[ny, nx] == 0:
+                        continue
+                    dist[ny, nx] = d
+                    queue[tail] = ny * W + nx
+                    tail += 1
+        return dist
+
+def multi_source_steps(walkable: np.ndarray, sources: List[Tuple[int,int]]) -> np.ndarray:
+    """8-connected step count from every walkable cell to the nearest source; -1 if unreachable.
+    Sources that are off-grid or not walkable are ignored (A* rejects such goals too)."""
+    H, W = walkable.shape
+    src = np.array([(y, x) for y, x in sources if 0<=y<H and 0<=x<W and walkable[y, x] != 0],
+                   dtype=np.int32).reshape(-1, 2)
+    if HAVE_NUMBA:
+        return _bfs_steps_numba(walkable, src)
+    dist = np.full((H, W), -1, dtype=np.int32)
+    queue = deque()
+    for y, x in src.tolist():
+        if dist[y, x] == -1:
+            dist[y, x] = 0
+            queue.append((y, x))
+    while queue:
+        y, x = queue.popleft()
+        d = dist[y, x] + 1
+        for dy, dx in NEI8:
+            ny, nx = y+dy, x+dx
+            if 0<=ny<H and 0<=nx<W and dist[ny, nx] == -1 and walkable[ny, nx] != 0:
+                dist[ny, nx] = d
+                queue.append((ny, nx))
+    return dist
+
 # ---------- Neighborhood searches ----------
 def nearest_walkable(walkable: np.ndarray, seed_y: int, seed_x: int, max_r: int = 600, stride: int = 3) -> Optional[Tuple[int,int]]:
     H, W = walkable.shape
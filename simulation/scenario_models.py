@@ -68,6 +68,7 @@ class ExperimentConfig(BaseModel):
     speed: float = 1.0
     baseline_dir: str = "out/society145_1km"
     exp_out_dir: str = "simulation/out/experiments"
+    verbose: bool = False  # per-step progress lines from each scenario worker
 
 
 __all__ = [
@@ -5,14 +5,19 @@ Run this before your demo to ensure everything is loaded and ready.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import sys
 
+# One keep-alive connection pool for the health check, warmup, start_run and decide calls
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+
 def warmup_brain_server():
     """Warmup the brain server model."""
     try:
         print("🔥 Warming up brain server...")
-        response = requests.post("http://127.0.0.1:9000/warmup", timeout=120)
+        response = _session.post("http://127.0.0.1:9000/warmup", timeout=120)
         if response.status_code == 200:
             result = response.json()
             if result.get("status") == "warmed":
@@ -35,7 +40,7 @@ def test_agent_decision():
         print("🧠 Testing agent decision making...")
         
         # Start a test run
-        start_response = requests.post("http://127.0.0.1:9000/start_run", json={
+        start_response = _session.post("http://127.0.0.1:9000/start_run", json={
             "hypothesisId": "warmup-test",
             "seed": 12345,
             "speed": 1.0
@@ -48,7 +53,7 @@ def test_agent_decision():
         run_id = start_response.json()["runId"]
         
         # Test a decision
-        decision_response = requests.post("http://127.0.0.1:9000/decide", json={
+        decision_response = _session.post("http://127.0.0.1:9000/decide", json={
             "runId": run_id,
             "agents": [{
                 "id": "test_agent",
@@ -79,7 +84,7 @@ def main():
     
     # Check if brain server is running
     try:
-        requests.get("http://127.0.0.1:9000", timeout=5)
+        _session.get("http://127.0.0.1:9000", timeout=5)
     except:
         print("❌ Brain server not running!")
         print("💡 Start it with: uvicorn simulation.brain_server:app --host 127.0.0.1 --port 9000 --reload")